@@ -0,0 +1,254 @@
+"""
+In-process Analytics Engine (pandas)
+Alternative to the server-side SQL in github_sync_analytics.py: pulls the
+season's games and player_game_stats once as columnar snapshots, computes
+standings and defense-vs-position with vectorized group-bys, and writes both
+result tables back in one short transaction.
+
+The aggregation runs on the ETL runner instead of the production Postgres.
+Final division and rounding happen on the small result frames with Decimal
+so values match PostgreSQL's numeric ROUND (half away from zero).
+"""
+
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from metrics import get_metrics
+
+POSITION_GROUPS = {'G': 'G', 'PG': 'G', 'SG': 'G', 'F': 'F', 'SF': 'F', 'PF': 'F', 'C': 'C'}
+
+STANDINGS_COLUMNS = (
+    'team_id', 'season_id', 'wins', 'losses', 'win_pct', 'games_behind',
+    'home_wins', 'home_losses', 'away_wins', 'away_losses',
+    'conference', 'division', 'conference_rank', 'division_rank',
+    'streak', 'last_10', 'points_for', 'points_against', 'point_differential',
+)
+
+DVP_COLUMNS = (
+    'season', 'team_id', 'opponent_position', 'games_played',
+    'points_allowed', 'points_allowed_per_game',
+    'fg_pct_allowed', 'fg3_pct_allowed', 'ft_pct_allowed',
+    'rebounds_allowed', 'assists_allowed', 'steals_allowed', 'blocks_allowed', 'turnovers_forced',
+    'rebounds_allowed_per_game', 'assists_allowed_per_game',
+    'points_allowed_rank', 'fg_pct_allowed_rank',
+)
+
+def _frame(cur, sql, params=None):
+    cur.execute(sql, params)
+    return pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+
+def load_snapshots(cur, season):
+    """Read teams, the season's Final games and their player rows"""
+    teams = _frame(cur, "SELECT team_id, conference, division FROM teams")
+    games = _frame(cur, """
+        SELECT game_id, game_date, home_team_id, away_team_id, home_team_score, away_team_score
+        FROM games
+        WHERE season = %s AND game_status = 'Final'
+    """, (season,))
+    players = _frame(cur, """
+        SELECT pgs.game_id, pgs.team_id, pgs.points, pgs.rebounds, pgs.assists, pgs.steals,
+               pgs.blocks, pgs.turnovers, pgs.fg_made, pgs.fg_attempted, pgs.fg3_made,
+               pgs.fg3_attempted, pgs.ft_made, pgs.ft_attempted, pgs.start_position
+        FROM player_game_stats pgs
+        JOIN games g ON g.game_id = pgs.game_id
+        WHERE pgs.season = %s AND g.season = %s AND g.game_status = 'Final'
+    """, (season, season))
+    return teams, games, players
+
+def _round(numerator, denominator, places):
+    """ROUND(numerator / denominator, places) with numeric semantics; None if denominator is 0"""
+    if not denominator:
+        return None
+    value = Decimal(int(numerator)) / Decimal(int(denominator))
+    return value.quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+
+def team_game_log(games):
+    """Two rows per game (team, opponent perspective), like the team_games table"""
+    home = pd.DataFrame({
+        'game_id': games['game_id'], 'game_date': games['game_date'],
+        'team_id': games['home_team_id'], 'is_home': True,
+        'team_score': games['home_team_score'], 'opponent_score': games['away_team_score'],
+    })
+    away = pd.DataFrame({
+        'game_id': games['game_id'], 'game_date': games['game_date'],
+        'team_id': games['away_team_id'], 'is_home': False,
+        'team_score': games['away_team_score'], 'opponent_score': games['home_team_score'],
+    })
+    return pd.concat([home, away], ignore_index=True)
+
+def compute_standings(teams, games, season):
+    log = team_game_log(games).merge(teams, on='team_id')
+    if log.empty:
+        return pd.DataFrame(columns=STANDINGS_COLUMNS)
+
+    won = log['team_score'] > log['opponent_score']
+    lost = log['team_score'] < log['opponent_score']
+    log = log.assign(
+        win=won, loss=lost,
+        home_win=won & log['is_home'], home_loss=lost & log['is_home'],
+        away_win=won & ~log['is_home'], away_loss=lost & ~log['is_home'],
+    )
+    totals = log.groupby(['team_id', 'conference', 'division'], as_index=False).agg(
+        wins=('win', 'sum'), losses=('loss', 'sum'),
+        home_wins=('home_win', 'sum'), home_losses=('home_loss', 'sum'),
+        away_wins=('away_win', 'sum'), away_losses=('away_loss', 'sum'),
+        games=('team_score', 'count'),
+        points_for_sum=('team_score', 'sum'), points_against_sum=('opponent_score', 'sum'),
+    )
+
+    # Streak and last 10 from the game log, most recent first
+    decided = log[won | lost].sort_values(['team_id', 'game_date', 'game_id'], ascending=[True, False, False])
+    decided = decided.assign(result=decided['win'].map({True: 'W', False: 'L'}))
+    by_team = decided.groupby('team_id')
+    decided = decided.assign(
+        latest=by_team['result'].transform('first'),
+        recency=by_team.cumcount(),
+    )
+    decided = decided.assign(breaks=(decided['result'] != decided['latest']).groupby(decided['team_id']).cumsum())
+    recent = decided[decided['recency'] < 10]
+    form = pd.DataFrame({
+        'streak': decided.groupby('team_id')['latest'].first()
+                  + decided[decided['breaks'] == 0].groupby('team_id').size().astype(str),
+        'last_10': recent.groupby('team_id')['win'].sum().astype(int).astype(str)
+                   + '-' + recent.groupby('team_id')['loss'].sum().astype(int).astype(str),
+    }).reset_index()
+    standings = totals.merge(form, on='team_id', how='left')
+
+    # Ranks and games behind within each conference/division
+    standings = standings.sort_values(['wins', 'losses', 'team_id'], ascending=[False, True, True])
+    standings['conference_rank'] = standings.groupby('conference').cumcount() + 1
+    standings['division_rank'] = standings.groupby('division').cumcount() + 1
+    max_wins = standings.groupby('conference')['wins'].transform('max')
+    leaders = standings[standings['wins'] == max_wins].groupby('conference')['losses'].min()
+    leader_losses = standings['conference'].map(leaders)
+
+    rows = []
+    for r, gb_wins, gb_losses in zip(standings.itertuples(index=False), max_wins - standings['wins'],
+                                     standings['losses'] - leader_losses):
+        decided_games = r.wins + r.losses
+        rows.append({
+            'team_id': int(r.team_id),
+            'season_id': season,
+            'wins': int(r.wins),
+            'losses': int(r.losses),
+            'win_pct': _round(r.wins, decided_games, 3) if decided_games else Decimal('0.000'),
+            'games_behind': (Decimal(int(gb_wins)) + Decimal(int(gb_losses)) * Decimal('0.5')).quantize(Decimal('0.1')),
+            'home_wins': int(r.home_wins),
+            'home_losses': int(r.home_losses),
+            'away_wins': int(r.away_wins),
+            'away_losses': int(r.away_losses),
+            'conference': r.conference,
+            'division': r.division,
+            'conference_rank': int(r.conference_rank),
+            'division_rank': int(r.division_rank),
+            'streak': r.streak if isinstance(r.streak, str) else None,
+            'last_10': r.last_10 if isinstance(r.last_10, str) else None,
+            'points_for': _round(r.points_for_sum, r.games, 1),
+            'points_against': _round(r.points_against_sum, r.games, 1),
+            'point_differential': _round(r.points_for_sum - r.points_against_sum, r.games, 1),
+        })
+    return pd.DataFrame(rows, columns=STANDINGS_COLUMNS)
+
+def compute_dvp(games, players, season):
+    positions = players['start_position'].map(POSITION_GROUPS)
+    starters = players[positions.notna()].assign(opponent_position=positions[positions.notna()])
+    starters = starters.merge(games[['game_id', 'home_team_id', 'away_team_id']], on='game_id')
+
+    # The defending team is the other side of the game
+    is_home_player = starters['team_id'] == starters['home_team_id']
+    is_away_player = starters['team_id'] == starters['away_team_id']
+    starters = starters[is_home_player | is_away_player]
+    starters = starters.assign(defense_team_id=starters['away_team_id'].where(is_home_player, starters['home_team_id']))
+    if starters.empty:
+        return pd.DataFrame(columns=DVP_COLUMNS)
+
+    stat_columns = ['points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+                    'fg_made', 'fg_attempted', 'fg3_made', 'fg3_attempted', 'ft_made', 'ft_attempted']
+    grouped = starters.groupby(['defense_team_id', 'opponent_position'])
+    agg = grouped[stat_columns].sum()
+    agg['games_played'] = grouped['game_id'].nunique()
+    agg['points_count'] = grouped['points'].count()
+    agg['rebounds_count'] = grouped['rebounds'].count()
+    agg['assists_count'] = grouped['assists'].count()
+    agg = agg.reset_index()
+
+    # Rank on the unrounded values, as the SQL window functions do
+    agg['avg_points'] = agg['points'] / agg['points_count']
+    agg['fg_ratio'] = (agg['fg_made'] / agg['fg_attempted']).where(agg['fg_attempted'] > 0)
+    agg = agg.sort_values(['opponent_position', 'avg_points', 'defense_team_id'])
+    agg['points_rank'] = agg.groupby('opponent_position').cumcount() + 1
+    agg = agg.sort_values(['opponent_position', 'fg_ratio', 'defense_team_id'], na_position='last')
+    agg['fg_pct_rank'] = agg.groupby('opponent_position').cumcount() + 1
+    agg = agg.sort_values(['defense_team_id', 'opponent_position'])
+
+    rows = []
+    two = Decimal('0.01')
+    for r in agg.itertuples(index=False):
+        if r.games_played <= 0:
+            continue
+        rows.append({
+            'season': season,
+            'team_id': int(r.defense_team_id),
+            'opponent_position': r.opponent_position,
+            'games_played': int(r.games_played),
+            'points_allowed': Decimal(int(r.points)).quantize(two),
+            'points_allowed_per_game': _round(r.points, r.points_count, 2),
+            'fg_pct_allowed': _round(r.fg_made * 100, r.fg_attempted, 2),
+            'fg3_pct_allowed': _round(r.fg3_made * 100, r.fg3_attempted, 2),
+            'ft_pct_allowed': _round(r.ft_made * 100, r.ft_attempted, 2),
+            'rebounds_allowed': Decimal(int(r.rebounds)).quantize(two),
+            'assists_allowed': Decimal(int(r.assists)).quantize(two),
+            'steals_allowed': Decimal(int(r.steals)).quantize(two),
+            'blocks_allowed': Decimal(int(r.blocks)).quantize(two),
+            'turnovers_forced': Decimal(int(r.turnovers)).quantize(two),
+            'rebounds_allowed_per_game': _round(r.rebounds, r.rebounds_count, 2),
+            'assists_allowed_per_game': _round(r.assists, r.assists_count, 2),
+            'points_allowed_rank': int(r.points_rank),
+            'fg_pct_allowed_rank': int(r.fg_pct_rank),
+        })
+    return pd.DataFrame(rows, columns=DVP_COLUMNS)
+
+def write_results(cur, season, standings, dvp):
+    """Replace the season's standings and DVP rows in bulk"""
+    cur.execute("DELETE FROM team_standings WHERE season_id = %s", (season,))
+    execute_values(
+        cur,
+        f"INSERT INTO team_standings ({', '.join(STANDINGS_COLUMNS)}, last_updated) VALUES %s",
+        list(standings.itertuples(index=False, name=None)),
+        template='(' + ', '.join(['%s'] * len(STANDINGS_COLUMNS)) + ', NOW())',
+    )
+    cur.execute("DELETE FROM defensive_stats_by_position WHERE season = %s", (season,))
+    execute_values(
+        cur,
+        f"INSERT INTO defensive_stats_by_position ({', '.join(DVP_COLUMNS)}, calculated_at) VALUES %s",
+        list(dvp.itertuples(index=False, name=None)),
+        template='(' + ', '.join(['%s'] * len(DVP_COLUMNS)) + ', NOW())',
+    )
+
+def run(loader, season):
+    """Snapshot, compute and write back; reports per-stage timing on stderr"""
+    metrics = get_metrics()
+    start = time.perf_counter()
+    with metrics.stage('snapshot'), loader.transaction() as cur:
+        teams, games, players = load_snapshots(cur, season)
+    print(f"-- Snapshot: {len(games)} games, {len(players)} player rows "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    start = time.perf_counter()
+    with metrics.stage('compute'):
+        standings = compute_standings(teams, games, season)
+        dvp = compute_dvp(games, players, season)
+    print(f"-- Computed {len(standings)} standings and {len(dvp)} DVP rows "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    start = time.perf_counter()
+    with metrics.stage('write'), loader.transaction() as cur:
+        write_results(cur, season, standings, dvp)
+    metrics.rows('team_standings', len(standings))
+    metrics.rows('defensive_stats_by_position', len(dvp))
+    print(f"-- Written in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return standings, dvp
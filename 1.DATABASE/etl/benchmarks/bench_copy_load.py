@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-row INSERT vs COPY output
+Generates synthetic games and player_game_stats rows, renders them with both
+sql_output writers and times loading each file through psql into a scratch
+schema. Each format is loaded twice: into empty tables, then again over the
+existing rows (the daily re-sync case).
+
+Usage:
+    python benchmarks/bench_copy_load.py --dsn postgresql://postgres@localhost/bench
+    python benchmarks/bench_copy_load.py --dsn ... --games 12300 --repeat 3
+"""
+
+import os
+import io
+import sys
+import time
+import random
+import argparse
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sql_output import GAMES, PLAYER_GAME_STATS, make_writer
+
+SCHEMA = 'bench_copy_load'
+PLAYERS_PER_GAME = 26
+
+SCHEMA_SQL = f"""
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.games (
+    game_id VARCHAR(20) PRIMARY KEY, game_date DATE, season VARCHAR(10),
+    home_team_id BIGINT, away_team_id BIGINT, home_team_score INT, away_team_score INT,
+    game_status VARCHAR(20), updated_at TIMESTAMP DEFAULT NOW()
+);
+CREATE TABLE {SCHEMA}.player_game_stats (
+    id SERIAL, game_id VARCHAR(20), season VARCHAR(10) NOT NULL, player_id BIGINT, team_id BIGINT,
+    minutes INT, points INT, rebounds INT, assists INT, steals INT, blocks INT, turnovers INT,
+    fg_made INT, fg_attempted INT, fg_pct NUMERIC(5,3), fg3_made INT, fg3_attempted INT,
+    fg3_pct NUMERIC(5,3), ft_made INT, ft_attempted INT, ft_pct NUMERIC(5,3),
+    start_position VARCHAR(5), created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (id, season)
+) PARTITION BY LIST (season);
+CREATE TABLE {SCHEMA}.player_game_stats_2025_26 PARTITION OF {SCHEMA}.player_game_stats FOR VALUES IN ('2025-26');
+CREATE INDEX ON {SCHEMA}.player_game_stats (game_id);
+"""
+
+def synthetic_rows(n_games, seed=42):
+    rng = random.Random(seed)
+    teams = [1610612737 + i for i in range(30)]
+    games, players = [], []
+    for i in range(n_games):
+        game_id = f"00225{i:05d}"
+        home, away = rng.sample(teams, 2)
+        games.append((game_id, f"2025-{10 + i % 3:02d}-{1 + i % 28:02d}", '2025-26',
+                      home, away, rng.randint(90, 135), rng.randint(90, 135), 'Final'))
+        for p in range(PLAYERS_PER_GAME):
+            team_id = home if p < PLAYERS_PER_GAME // 2 else away
+            fga, fg3a, fta = rng.randint(0, 25), rng.randint(0, 12), rng.randint(0, 10)
+            fgm, fg3m, ftm = rng.randint(0, fga), rng.randint(0, fg3a), rng.randint(0, fta)
+            players.append((
+                game_id, '2025-26', 200000 + p + (i % 500) * PLAYERS_PER_GAME, team_id, rng.randint(0, 42),
+                rng.randint(0, 45), rng.randint(0, 15), rng.randint(0, 12), rng.randint(0, 4),
+                rng.randint(0, 4), rng.randint(0, 6), fgm, fga, round(fgm / fga, 3) if fga else 0,
+                fg3m, fg3a, round(fg3m / fg3a, 3) if fg3a else 0, ftm, fta,
+                round(ftm / fta, 3) if fta else 0,
+                ['F', 'F', 'C', 'G', 'G'][p % 13] if p % 13 < 5 else None,
+            ))
+    return games, players
+
+def render(output_format, games, players):
+    out = io.StringIO()
+    print("BEGIN;", file=out)
+    for spec, rows in ((GAMES, games), (PLAYER_GAME_STATS, players)):
+        writer = make_writer(output_format, spec, out)
+        writer.begin()
+        last_key = None
+        for row in rows:
+            if spec.mode == 'replace' and row[0] != last_key:
+                writer.replace(row[0])
+                last_key = row[0]
+            writer.write(row)
+        writer.end()
+    print("COMMIT;", file=out)
+    return out.getvalue()
+
+def psql(dsn, sql_path):
+    env = dict(os.environ, PGOPTIONS=f"-c search_path={SCHEMA}")
+    start = time.perf_counter()
+    subprocess.run(['psql', dsn, '-q', '-v', 'ON_ERROR_STOP=1', '-f', sql_path],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def run_sql(dsn, sql):
+    subprocess.run(['psql', dsn, '-q', '-v', 'ON_ERROR_STOP=1', '-c', sql],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare INSERT and COPY output load times')
+    parser.add_argument('--dsn', required=True, help='Throwaway database (a scratch schema is created and dropped)')
+    parser.add_argument('--games', type=int, default=1230, help='Synthetic games (default: one season, 1230)')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    games, players = synthetic_rows(args.games)
+    print(f"-- {len(games)} games, {len(players)} player rows", file=sys.stderr)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for output_format in ('insert', 'copy'):
+            sql = render(output_format, games, players)
+            path = os.path.join(tmp, f"{output_format}.sql")
+            with open(path, 'w') as f:
+                f.write(sql)
+
+            timings = {'empty': [], 'reload': []}
+            for _ in range(args.repeat):
+                run_sql(args.dsn, SCHEMA_SQL)
+                timings['empty'].append(psql(args.dsn, path))
+                timings['reload'].append(psql(args.dsn, path))
+            results[output_format] = (len(sql), {k: min(v) for k, v in timings.items()})
+
+        run_sql(args.dsn, f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+
+    rows = len(games) + len(players)
+    print(f"{'format':<8} {'sql MB':>8} {'empty s':>9} {'reload s':>9} {'rows/s':>10}")
+    for output_format, (size, best) in results.items():
+        print(f"{output_format:<8} {size / 1024 / 1024:>8.1f} {best['empty']:>9.2f} "
+              f"{best['reload']:>9.2f} {rows / best['reload']:>10.0f}")
+    speedup = results['insert'][1]['reload'] / results['copy'][1]['reload']
+    print(f"-- COPY reload speedup: {speedup:.1f}x", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: box score row decoding, col_idx lookups vs the compiled decoder
+Decodes synthetic boxscoretraditionalv2 payloads into PLAYER_GAME_STATS row
+tuples two ways and reports rows per second (best of --repeat):
+
+    col_idx   the previous parse: a col_idx.get() lookup per column into a
+              dict per player, then a tuple in column order for the writer
+    compiled  parse_stats_box_score() through result_sets.ResultSetDecoder
+
+Both must produce identical rows, or the benchmark fails.
+
+Usage:
+    python benchmarks/bench_decode.py
+    python benchmarks/bench_decode.py --games 12300 --repeat 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_sync_player_stats import SEASON, parse_minutes, parse_stats_box_score
+from sql_output import PLAYER_GAME_STATS
+from synthetic import TEAM_IDS, generate_box_score
+
+def legacy_parse(game_id, box_score):
+    """The col_idx.get() parse the decoder replaced, plus the writer's tuple conversion"""
+    player_stats = None
+    for rs in box_score.get('resultSets', []):
+        if rs.get('name') == 'PlayerStats':
+            player_stats = rs
+            break
+    if not player_stats:
+        return []
+
+    col_idx = {h: i for i, h in enumerate(player_stats['headers'])}
+    players = []
+    for row in player_stats['rowSet']:
+        players.append({
+            'game_id': game_id,
+            'season': SEASON,
+            'player_id': row[col_idx.get('PLAYER_ID', 0)],
+            'team_id': row[col_idx.get('TEAM_ID', 0)],
+            'minutes': parse_minutes(row[col_idx.get('MIN', 0)]),
+            'points': row[col_idx.get('PTS', 0)] or 0,
+            'rebounds': row[col_idx.get('REB', 0)] or 0,
+            'assists': row[col_idx.get('AST', 0)] or 0,
+            'steals': row[col_idx.get('STL', 0)] or 0,
+            'blocks': row[col_idx.get('BLK', 0)] or 0,
+            'turnovers': row[col_idx.get('TO', 0)] or 0,
+            'fg_made': row[col_idx.get('FGM', 0)] or 0,
+            'fg_attempted': row[col_idx.get('FGA', 0)] or 0,
+            'fg_pct': row[col_idx.get('FG_PCT', 0)] or 0,
+            'fg3_made': row[col_idx.get('FG3M', 0)] or 0,
+            'fg3_attempted': row[col_idx.get('FG3A', 0)] or 0,
+            'fg3_pct': row[col_idx.get('FG3_PCT', 0)] or 0,
+            'ft_made': row[col_idx.get('FTM', 0)] or 0,
+            'ft_attempted': row[col_idx.get('FTA', 0)] or 0,
+            'ft_pct': row[col_idx.get('FT_PCT', 0)] or 0,
+            'start_position': row[col_idx.get('START_POSITION', '')] or None,
+        })
+    return [tuple(p[c] for c in PLAYER_GAME_STATS.columns) for p in players]
+
+DECODERS = {
+    'col_idx': legacy_parse,
+    'compiled': parse_stats_box_score,
+}
+
+def synthetic_payloads(n_games, seed=0):
+    """(game_id, payload) pairs, decoded from JSON as a real response would be"""
+    payloads = []
+    for i in range(n_games):
+        game_id = f"00225{i:05d}"
+        home, away = TEAM_IDS[i % 30], TEAM_IDS[(i + 7) % 30]
+        payloads.append((game_id, json.loads(json.dumps(generate_box_score(game_id, home, away, seed)))))
+    return payloads
+
+def time_decoder(decode, payloads, repeat):
+    """(best seconds, rows) over repeat passes through every payload"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = 0
+        for game_id, payload in payloads:
+            rows += len(decode(game_id, payload))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark box score row decoding')
+    parser.add_argument('--games', type=int, default=1230, help='Synthetic box scores (default: one season)')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes per decoder; the best is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    payloads = synthetic_payloads(args.games, args.seed)
+    for game_id, payload in payloads:
+        if legacy_parse(game_id, payload) != parse_stats_box_score(game_id, payload):
+            print(f"-- ERROR: decoders disagree on {game_id}", file=sys.stderr)
+            sys.exit(1)
+
+    print(f"{'decoder':<10} {'rows':>9} {'seconds':>9} {'rows/sec':>12}")
+    rates = {}
+    for name, decode in DECODERS.items():
+        elapsed, rows = time_decoder(decode, payloads, args.repeat)
+        rates[name] = rows / elapsed
+        print(f"{name:<10} {rows:>9} {elapsed:>9.3f} {rates[name]:>12,.0f}")
+    print(f"-- compiled decoder: {rates['compiled'] / rates['col_idx']:.2f}x the col_idx rows/sec")
+
+if __name__ == '__main__':
+    main()
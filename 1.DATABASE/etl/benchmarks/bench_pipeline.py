@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end sync pipeline on synthetic payloads
+Generates a synthetic scheduleLeagueV2.json feed and boxscoretraditionalv2
+responses at one of three scales, then times:
+
+    games_main         github_sync_games.main() (schedule parse + SQL output)
+    player_stats_main  github_sync_player_stats.main() (box score parse + SQL output)
+    load_games         psql import of the games SQL          (with --dsn)
+    load_player_stats  psql import of the player stats SQL   (with --dsn)
+    analytics          github_sync_analytics.py SQL through psql, first run
+    analytics_noop     the same again with nothing changed
+
+The network is stubbed out: fetch_schedule() returns the synthetic feed and
+box scores come from an in-memory source (decoded from JSON bytes, as a real
+response would be). The SQL loads into a scratch schema that is dropped
+afterwards.
+
+Results are compared with benchmarks/baselines/pipeline_<scale>_<format>.json
+when it exists: a stage more than --tolerance slower, and at least
+MIN_REGRESSION_SECONDS slower, is a REGRESSION. --save-baseline records the
+current run as the new baseline.
+
+Usage:
+    python benchmarks/bench_pipeline.py --scale week
+    python benchmarks/bench_pipeline.py --scale season --dsn postgresql://postgres@localhost/bench
+    python benchmarks/bench_pipeline.py --scale ten-seasons --dsn ... --save-baseline
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+
+import github_sync_games
+import github_sync_player_stats
+import github_sync_analytics
+from synthetic import (PLAYERS_PER_GAME, DNP_PER_TEAM, generate_schedule, generate_box_score,
+                       load_dataset)
+
+SCHEMA = 'bench_pipeline'
+SCALES = {
+    'week': 7,
+    'season': 165,
+    'ten-seasons': 1650,
+}
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+DEFAULT_TOLERANCE = 0.25  # flag timings more than 25% slower than the baseline
+MIN_REGRESSION_SECONDS = 0.1  # slowdowns smaller than this are noise, whatever the ratio
+
+def run_main(module, argv, sql_path):
+    """Run a script's main() with argv, SQL to sql_path and stderr discarded"""
+    saved_argv = sys.argv
+    sys.argv = [module.__file__] + argv
+    start = time.perf_counter()
+    try:
+        with open(sql_path, 'w') as out, redirect_stdout(out), redirect_stderr(io.StringIO()):
+            module.main()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise
+    finally:
+        sys.argv = saved_argv
+    return time.perf_counter() - start
+
+def psql(dsn, sql_path):
+    env = dict(os.environ, PGOPTIONS=f"-c search_path={SCHEMA} -c client_min_messages=warning")
+    start = time.perf_counter()
+    subprocess.run(['psql', dsn, '-q', '-v', 'ON_ERROR_STOP=1', '-f', sql_path],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def stub_network(schedule_path, game_ids, payloads):
+    """Point the sync scripts at the synthetic feed and box scores"""
+    github_sync_games.fetch_schedule = lambda path=None: schedule_path
+    github_sync_player_stats.fetch_recent_game_ids = lambda source='schedule', days=None: list(game_ids)
+
+    def fetch_synthetic(game_id, limiter=None):
+        return json.loads(payloads[game_id])
+
+    github_sync_player_stats.BOX_SCORE_SOURCES['synthetic'] = github_sync_player_stats.BoxScoreSource(
+        fetch_synthetic, rate_limited=False)
+
+def run_benchmark(args, tmp):
+    days = SCALES[args.scale]
+    start = time.perf_counter()
+    schedule, games = generate_schedule(days, date.today() - timedelta(days=1), seed=args.seed)
+    schedule_path = os.path.join(tmp, 'scheduleLeagueV2.json')
+    with open(schedule_path, 'w') as f:
+        json.dump(schedule, f)
+    payloads = {game_id: json.dumps(generate_box_score(game_id, home, away, args.seed)).encode()
+                for game_id, home, away in games}
+    print(f"-- {args.scale}: {len(games)} games, schedule {os.path.getsize(schedule_path) / 1e6:.1f} MB, "
+          f"box scores {sum(map(len, payloads.values())) / 1e6:.1f} MB "
+          f"(generated in {time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+    stub_network(schedule_path, [game_id for game_id, _, _ in games], payloads)
+    common = ['--full', '--format', args.format, '--manifest', os.path.join(tmp, 'manifest.json')]
+    paths = {name: os.path.join(tmp, f"{name}.sql") for name in ('games', 'player_stats', 'analytics')}
+
+    timings = {}
+    timings['games_main'] = run_main(github_sync_games, common, paths['games'])
+    timings['player_stats_main'] = run_main(
+        github_sync_player_stats,
+        common + ['--no-cache', '--sources', 'synthetic', '--workers', str(args.workers)],
+        paths['player_stats'])
+
+    player_rows = len(games) * (PLAYERS_PER_GAME + 2 * DNP_PER_TEAM)
+
+    if args.dsn:
+        conn = psycopg2.connect(args.dsn)
+        load_dataset(conn, SCHEMA, 0)  # empty production-shaped schema plus teams
+        try:
+            timings['load_games'] = psql(args.dsn, paths['games'])
+            timings['load_player_stats'] = psql(args.dsn, paths['player_stats'])
+            run_main(github_sync_analytics, [], paths['analytics'])
+            timings['analytics'] = psql(args.dsn, paths['analytics'])
+            run_main(github_sync_analytics, [], paths['analytics'])
+            timings['analytics_noop'] = psql(args.dsn, paths['analytics'])
+        finally:
+            if not args.keep:
+                with conn.cursor() as cur:
+                    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+                conn.commit()
+            conn.close()
+
+    rows_per_second = {name: round(player_rows / timings[name])
+                       for name in ('player_stats_main', 'load_player_stats') if name in timings}
+    return {
+        'scale': args.scale,
+        'format': args.format,
+        'games': len(games),
+        'player_rows': player_rows,
+        'sql_bytes': {name: os.path.getsize(path) for name, path in paths.items() if os.path.exists(path)},
+        'timings': {name: round(seconds, 3) for name, seconds in timings.items()},
+        'rows_per_second': rows_per_second,
+    }
+
+def environment(dsn):
+    env = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    if dsn:
+        conn = psycopg2.connect(dsn)
+        with conn.cursor() as cur:
+            cur.execute("SHOW server_version")
+            env['postgres'] = cur.fetchone()[0]
+        conn.close()
+    return env
+
+def compare(result, baseline, tolerance):
+    """Print timings against the baseline; returns the names that regressed"""
+    regressions = []
+    print(f"{'stage':<20} {'baseline s':>11} {'current s':>10} {'change':>8}")
+    for name, seconds in result['timings'].items():
+        before = baseline['timings'].get(name)
+        if before is None:
+            print(f"{name:<20} {'-':>11} {seconds:>10.3f} {'new':>8}")
+            continue
+        change = (seconds - before) / before if before else 0.0
+        flag = ''
+        if change > tolerance and seconds - before >= MIN_REGRESSION_SECONDS:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<20} {before:>11.3f} {seconds:>10.3f} {change:>+8.0%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sync pipeline on synthetic payloads')
+    parser.add_argument('--scale', choices=SCALES, default='week',
+                        help='week (~50 games), season (1230) or ten-seasons (12300)')
+    parser.add_argument('--dsn', help='Throwaway database for the load and analytics stages')
+    parser.add_argument('--format', choices=('insert', 'copy'), default='copy')
+    parser.add_argument('--workers', type=int, default=github_sync_player_stats.DEFAULT_WORKERS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline-dir', default=BASELINE_DIR)
+    parser.add_argument('--save-baseline', action='store_true', help='Record this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Relative slowdown reported as a regression (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if any stage regressed')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch schema')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run_benchmark(args, tmp)
+    result['environment'] = environment(args.dsn)
+
+    baseline_path = os.path.join(args.baseline_dir, f"pipeline_{args.scale}_{args.format}.json")
+    regressions = []
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+    else:
+        for name, seconds in result['timings'].items():
+            print(f"{name:<20} {seconds:>10.3f}s")
+    print(json.dumps(result['rows_per_second']), file=sys.stderr)
+
+    if args.save_baseline:
+        os.makedirs(args.baseline_dir, exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        print(f"-- Baseline saved to {baseline_path}", file=sys.stderr)
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
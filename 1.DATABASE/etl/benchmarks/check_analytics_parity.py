@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Parity check: SQL analytics vs the pandas engine
+Loads a synthetic dataset into a scratch schema, computes standings and DVP
+with the server-side SQL from github_sync_analytics.py, then recomputes them
+with analytics_pandas and writes them back through the same tables. Every
+column except timestamps must match exactly; exits 1 on any difference.
+
+Usage:
+    python benchmarks/check_analytics_parity.py --dsn postgresql://postgres@localhost/bench
+    python benchmarks/check_analytics_parity.py --dsn ... --seasons 3 --seed 7
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+
+import analytics_pandas
+import github_sync_analytics as analytics
+from synthetic import load_dataset, split_statements
+
+SCHEMA = 'bench_analytics_parity'
+
+STANDINGS_QUERY = f"""
+SELECT {', '.join(analytics_pandas.STANDINGS_COLUMNS)}
+FROM team_standings WHERE season_id = %s ORDER BY team_id
+"""
+DVP_QUERY = f"""
+SELECT {', '.join(analytics_pandas.DVP_COLUMNS)}
+FROM defensive_stats_by_position WHERE season = %s ORDER BY team_id, opponent_position
+"""
+
+def fetch(cur, query):
+    cur.execute(query, (analytics.SEASON,))
+    return cur.fetchall()
+
+def compare(name, columns, expected, actual):
+    """Print differing rows; returns the number of mismatches"""
+    mismatches = 0
+    if len(expected) != len(actual):
+        print(f"-- {name}: {len(expected)} SQL rows vs {len(actual)} pandas rows", file=sys.stderr)
+        mismatches += 1
+    for sql_row, pandas_row in zip(expected, actual):
+        for column, a, b in zip(columns, sql_row, pandas_row):
+            if a != b:
+                print(f"-- {name} {sql_row[:3]}: {column} sql={a!r} pandas={b!r}", file=sys.stderr)
+                mismatches += 1
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the pandas analytics engine against the SQL engine')
+    parser.add_argument('--dsn', required=True, help='Throwaway database (a scratch schema is created and dropped)')
+    parser.add_argument('--seasons', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    counts = load_dataset(conn, SCHEMA, args.seasons, seed=args.seed)
+    print(f"-- Loaded {counts['games']} games, {counts['player_game_stats']} player rows", file=sys.stderr)
+
+    with conn.cursor() as cur:
+        start = time.perf_counter()
+        sql = analytics.team_games_sql(full=True) + analytics.standings_sql(full=True) + analytics.dvp_sql()
+        for statement in split_statements(sql):
+            cur.execute(statement)
+        sql_time = time.perf_counter() - start
+        sql_standings = fetch(cur, STANDINGS_QUERY)
+        sql_dvp = fetch(cur, DVP_QUERY)
+
+        start = time.perf_counter()
+        teams, games, players = analytics_pandas.load_snapshots(cur, analytics.SEASON)
+        standings = analytics_pandas.compute_standings(teams, games, analytics.SEASON)
+        dvp = analytics_pandas.compute_dvp(games, players, analytics.SEASON)
+        analytics_pandas.write_results(cur, analytics.SEASON, standings, dvp)
+        pandas_time = time.perf_counter() - start
+        pandas_standings = fetch(cur, STANDINGS_QUERY)
+        pandas_dvp = fetch(cur, DVP_QUERY)
+
+        cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    conn.commit()
+    conn.close()
+
+    mismatches = compare('standings', analytics_pandas.STANDINGS_COLUMNS, sql_standings, pandas_standings)
+    mismatches += compare('dvp', analytics_pandas.DVP_COLUMNS, sql_dvp, pandas_dvp)
+
+    print(f"-- SQL engine: {sql_time:.2f}s, pandas engine: {pandas_time:.2f}s", file=sys.stderr)
+    print(f"-- standings: {len(sql_standings)} rows, dvp: {len(sql_dvp)} rows, {mismatches} mismatches", file=sys.stderr)
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the analytics SQL
+Loads a synthetic multi-season dataset into a scratch schema and runs every
+statement of github_sync_analytics.py (team_games, standings, DVP and player
+aggregates) under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) in two scenarios:
+
+    full         a --full rebuild of the current season
+    incremental  a nightly run after the last game day's games and box
+                 scores were reloaded
+
+Each scenario runs as one transaction, like the nightly analytics. It is
+repeated --repeat times, and the median execution time is kept. For every
+statement the plan shape (node types, relations and indexes, without costs
+or row counts) is recorded, along with every sequential scan that reads at
+least --seq-scan-rows rows.
+
+Results are compared with benchmarks/baselines/query_plans_<seasons>.json
+when it exists:
+    REGRESSION  more than --tolerance slower (and at least MIN_REGRESSION_MS)
+    SEQ SCAN    a large sequential scan the baseline did not have
+    PLAN        the plan shape differs from the baseline
+--save-baseline records the current run as the new baseline, and
+--fail-on-regression exits 1 on a REGRESSION or a new SEQ SCAN.
+
+Usage:
+    python benchmarks/check_query_plans.py --dsn postgresql://postgres@localhost/bench
+    python benchmarks/check_query_plans.py --dsn ... --seasons 10 --save-baseline
+    python benchmarks/check_query_plans.py --dsn ... --plans --fail-on-regression
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+
+import github_sync_analytics as analytics
+from bench_pipeline import environment
+from synthetic import load_dataset, split_statements
+
+SCHEMA = 'bench_query_plans'
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+DEFAULT_SEASONS = 10
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.5  # EXPLAIN ANALYZE timings are noisier than whole-stage timings
+MIN_REGRESSION_MS = 5.0  # slowdowns smaller than this are noise, whatever the ratio
+SEQ_SCAN_ROWS = 10000  # sequential scans reading fewer rows are fine (teams, temp tables)
+EXPLAINABLE = ('INSERT', 'UPDATE', 'DELETE', 'WITH', 'SELECT', 'CREATE TEMP TABLE')
+
+QUERIES = {
+    'team_games': analytics.team_games_sql,
+    'standings': analytics.standings_sql,
+    'dvp': lambda full: analytics.dvp_sql(),
+    'player_aggregates': analytics.player_aggregates_sql,
+}
+SCENARIOS = {'full': True, 'incremental': False}
+
+# Reload the most recent game day, as a nightly sync does
+TOUCH_LAST_DAY_SQL = f"""
+UPDATE games SET updated_at = NOW()
+WHERE season = '{analytics.SEASON}'
+    AND game_date = (SELECT MAX(game_date) FROM games WHERE season = '{analytics.SEASON}');
+UPDATE player_game_stats SET created_at = NOW()
+WHERE season = '{analytics.SEASON}' AND game_id IN (
+    SELECT game_id FROM games
+    WHERE season = '{analytics.SEASON}'
+        AND game_date = (SELECT MAX(game_date) FROM games WHERE season = '{analytics.SEASON}')
+);
+"""
+
+def plan_shape(node, depth=0):
+    """Indented node lines: type, relation and index only"""
+    label = node['Node Type']
+    if node.get('Relation Name'):
+        label += f" on {node['Relation Name']}"
+    if node.get('Index Name'):
+        label += f" using {node['Index Name']}"
+    lines = ['  ' * depth + label]
+    for child in node.get('Plans', []):
+        lines.extend(plan_shape(child, depth + 1))
+    return lines
+
+def seq_scans(node, min_rows):
+    """'relation: rows read' for each sequential scan reading at least min_rows rows"""
+    found = []
+    if node['Node Type'] == 'Seq Scan':
+        rows = (node.get('Actual Rows', 0) + node.get('Rows Removed by Filter', 0)) * node.get('Actual Loops', 1)
+        if rows >= min_rows:
+            found.append((node['Relation Name'], int(rows)))
+    for child in node.get('Plans', []):
+        found.extend(seq_scans(child, min_rows))
+    return found
+
+def explain(cur, statement, min_rows):
+    cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}")
+    result = cur.fetchone()[0]
+    result = (json.loads(result) if isinstance(result, str) else result)[0]
+    plan = result['Plan']
+    return {
+        'ms': result['Execution Time'],
+        'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+        'shape': plan_shape(plan),
+        'seq_scans': seq_scans(plan, min_rows),
+    }
+
+def run_scenario(conn, scenario, full, min_rows):
+    """{key: explain result} for one run of every analytics statement, in one transaction"""
+    results = {}
+    with conn.cursor() as cur:
+        if not full:
+            cur.execute(TOUCH_LAST_DAY_SQL)
+            conn.commit()
+        for query, build in QUERIES.items():
+            for n, statement in enumerate(split_statements(build(full))):
+                if not statement.upper().startswith(EXPLAINABLE):
+                    cur.execute(statement)  # DDL (IF NOT EXISTS) and ANALYZE
+                    continue
+                result = explain(cur, statement, min_rows)
+                result['statement'] = statement.splitlines()[0][:60]
+                results[f"{scenario}/{query}/{n}"] = result
+    conn.commit()
+    return results
+
+def run_checks(conn, repeat, min_rows):
+    """Median timing and the last run's plan for every statement of every scenario"""
+    statements = {}
+    for scenario, full in SCENARIOS.items():
+        runs = [run_scenario(conn, scenario, full, min_rows) for _ in range(max(1, repeat))]
+        for key, result in runs[-1].items():
+            result['ms'] = round(statistics.median(run[key]['ms'] for run in runs), 2)
+            result['seq_scans'] = [f"{relation}: {rows} rows" for relation, rows in result['seq_scans']]
+            statements[key] = result
+    return statements
+
+def compare(statements, baseline, tolerance):
+    """Print every statement against the baseline; returns the failing findings"""
+    failures = []
+    print(f"{'statement':<34} {'baseline ms':>11} {'current ms':>10} {'change':>8}  findings")
+    for key, result in statements.items():
+        before = baseline['statements'].get(key)
+        findings = []
+        if before is None:
+            change = 'new'
+            before_ms = '-'
+        else:
+            before_ms = f"{before['ms']:.1f}"
+            ratio = (result['ms'] - before['ms']) / before['ms'] if before['ms'] else 0.0
+            change = f"{ratio:+.0%}"
+            if ratio > tolerance and result['ms'] - before['ms'] >= MIN_REGRESSION_MS:
+                findings.append('REGRESSION')
+                failures.append(f"{key}: {before['ms']:.1f} -> {result['ms']:.1f} ms")
+            if result['shape'] != before['shape']:
+                findings.append('PLAN')
+        # A scan of a relation the baseline also scanned is known, whatever its row count
+        known = {scan.split(':')[0] for scan in before['seq_scans']} if before else set()
+        for scan in result['seq_scans']:
+            if scan.split(':')[0] in known:
+                continue
+            findings.append(f"SEQ SCAN {scan}")
+            failures.append(f"{key}: seq scan on {scan}")
+        print(f"{key:<34} {before_ms:>11} {result['ms']:>10.1f} {change:>8}  {', '.join(findings)}")
+    return failures
+
+def print_plans(statements, baseline):
+    for key, result in statements.items():
+        before = baseline['statements'].get(key) if baseline else None
+        if before and before['shape'] == result['shape']:
+            continue
+        print(f"\n==== {key}: {result['statement']}")
+        if before:
+            print("-- baseline:\n" + '\n'.join(before['shape']))
+            print("-- current:")
+        print('\n'.join(result['shape']))
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN ANALYZE the analytics SQL and compare with a baseline')
+    parser.add_argument('--dsn', required=True, help='Throwaway database (a scratch schema is created and dropped)')
+    parser.add_argument('--seasons', type=int, default=DEFAULT_SEASONS,
+                        help=f'Synthetic seasons to load (default: {DEFAULT_SEASONS})')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Runs per scenario; the median time is kept (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--seq-scan-rows', type=int, default=SEQ_SCAN_ROWS,
+                        help=f'Report sequential scans reading at least this many rows (default: {SEQ_SCAN_ROWS})')
+    parser.add_argument('--baseline-dir', default=BASELINE_DIR)
+    parser.add_argument('--save-baseline', action='store_true', help='Record this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Relative slowdown reported as a regression (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit 1 on a timing regression or a new sequential scan')
+    parser.add_argument('--plans', action='store_true', help='Print plan shapes that are new or changed')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch schema afterwards')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    counts = load_dataset(conn, SCHEMA, args.seasons, seed=args.seed)
+    print(f"-- Loaded {args.seasons} seasons: {counts['games']} games, "
+          f"{counts['player_game_stats']} player rows", file=sys.stderr)
+
+    try:
+        # First build outside the measurements, so every measured run replaces existing rows
+        run_scenario(conn, 'setup', True, args.seq_scan_rows)
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+        conn.commit()
+        statements = run_checks(conn, args.repeat, args.seq_scan_rows)
+    finally:
+        if not args.keep:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+            conn.commit()
+        conn.close()
+
+    result = {
+        'seasons': args.seasons,
+        'games': counts['games'],
+        'player_rows': counts['player_game_stats'],
+        'statements': statements,
+        'environment': environment(args.dsn),
+    }
+    baseline_path = os.path.join(args.baseline_dir, f"query_plans_{args.seasons}.json")
+    baseline = None
+    failures = []
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        failures = compare(statements, baseline, args.tolerance)
+    else:
+        print(f"{'statement':<34} {'ms':>10} {'buffers':>9}  seq scans")
+        for key, statement in statements.items():
+            print(f"{key:<34} {statement['ms']:>10.1f} {statement['buffers']:>9}  "
+                  f"{', '.join(statement['seq_scans'])}")
+    if args.plans:
+        print_plans(statements, baseline)
+
+    if args.save_baseline:
+        os.makedirs(args.baseline_dir, exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        print(f"-- Baseline saved to {baseline_path}", file=sys.stderr)
+
+    for failure in failures:
+        print(f"-- {failure}", file=sys.stderr)
+    if failures and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OR-join analytics vs the team_games fact table
+Loads a synthetic multi-season dataset into a scratch schema and runs
+EXPLAIN (ANALYZE, BUFFERS) on the legacy standings/DVP queries (joining games
+ON home_team_id = t.team_id OR away_team_id = t.team_id) and on the current
+github_sync_analytics.py statements that read team_games. Every statement runs
+inside a transaction that is rolled back, so both variants see the same data.
+
+Usage:
+    python benchmarks/explain_team_games.py --dsn postgresql://postgres@localhost/bench --seasons 10
+    python benchmarks/explain_team_games.py --dsn ... --plans   # print full plans
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+
+import github_sync_analytics as analytics
+from synthetic import load_dataset, split_statements
+
+SCHEMA = 'bench_team_games'
+
+# Standings and DVP inserts as they were before team_games existed
+LEGACY_SQL = """
+INSERT INTO team_standings (
+    team_id, season_id, wins, losses, win_pct, games_behind,
+    home_wins, home_losses, away_wins, away_losses,
+    conference, division, conference_rank, division_rank,
+    streak, last_10, points_for, points_against, point_differential,
+    last_updated
+)
+WITH team_games AS (
+    SELECT
+        t.team_id,
+        t.conference,
+        t.division,
+        COUNT(*) FILTER (WHERE
+            (g.home_team_id = t.team_id AND g.home_team_score > g.away_team_score) OR
+            (g.away_team_id = t.team_id AND g.away_team_score > g.home_team_score)
+        ) as wins,
+        COUNT(*) FILTER (WHERE
+            (g.home_team_id = t.team_id AND g.home_team_score < g.away_team_score) OR
+            (g.away_team_id = t.team_id AND g.away_team_score < g.home_team_score)
+        ) as losses,
+        COUNT(*) FILTER (WHERE g.home_team_id = t.team_id AND g.home_team_score > g.away_team_score) as home_wins,
+        COUNT(*) FILTER (WHERE g.home_team_id = t.team_id AND g.home_team_score < g.away_team_score) as home_losses,
+        COUNT(*) FILTER (WHERE g.away_team_id = t.team_id AND g.away_team_score > g.home_team_score) as away_wins,
+        COUNT(*) FILTER (WHERE g.away_team_id = t.team_id AND g.away_team_score < g.home_team_score) as away_losses,
+        AVG(CASE WHEN g.home_team_id = t.team_id THEN g.home_team_score ELSE g.away_team_score END) as points_for,
+        AVG(CASE WHEN g.home_team_id = t.team_id THEN g.away_team_score ELSE g.home_team_score END) as points_against
+    FROM teams t
+    JOIN games g ON (g.home_team_id = t.team_id OR g.away_team_id = t.team_id)
+    WHERE g.season = '{SEASON}' AND g.game_status = 'Final'
+    GROUP BY t.team_id, t.conference, t.division
+),
+standings_ranked AS (
+    SELECT
+        tg.*,
+        CASE WHEN (wins + losses) > 0 THEN ROUND(wins::numeric / (wins + losses), 3) ELSE 0 END as win_pct,
+        ROUND((points_for - points_against)::numeric, 1) as point_differential,
+        ROW_NUMBER() OVER (PARTITION BY conference ORDER BY wins DESC, losses ASC) as conference_rank,
+        ROW_NUMBER() OVER (PARTITION BY division ORDER BY wins DESC, losses ASC) as division_rank
+    FROM team_games tg
+),
+conference_leader AS (
+    SELECT conference, MAX(wins) as max_wins
+    FROM standings_ranked
+    GROUP BY conference
+)
+SELECT
+    sr.team_id,
+    '{SEASON}' as season_id,
+    sr.wins,
+    sr.losses,
+    sr.win_pct,
+    ROUND((cl.max_wins - sr.wins)::numeric + (sr.losses - (SELECT MIN(losses) FROM standings_ranked sr2 WHERE sr2.conference = sr.conference AND sr2.wins = cl.max_wins))::numeric * 0.5, 1) as games_behind,
+    sr.home_wins,
+    sr.home_losses,
+    sr.away_wins,
+    sr.away_losses,
+    sr.conference,
+    sr.division,
+    sr.conference_rank,
+    sr.division_rank,
+    'W1' as streak,
+    '5-5' as last_10,
+    ROUND(sr.points_for, 1) as points_for,
+    ROUND(sr.points_against, 1) as points_against,
+    sr.point_differential,
+    NOW() as last_updated
+FROM standings_ranked sr
+JOIN conference_leader cl ON sr.conference = cl.conference;
+INSERT INTO defensive_stats_by_position (
+    season, team_id, opponent_position, games_played,
+    points_allowed, points_allowed_per_game,
+    fg_pct_allowed, fg3_pct_allowed, ft_pct_allowed,
+    rebounds_allowed, assists_allowed, steals_allowed, blocks_allowed, turnovers_forced,
+    rebounds_allowed_per_game, assists_allowed_per_game,
+    points_allowed_rank, fg_pct_allowed_rank,
+    calculated_at
+)
+WITH position_mapping AS (
+    SELECT 'G' as position UNION ALL
+    SELECT 'F' UNION ALL
+    SELECT 'C'
+),
+team_defense AS (
+    SELECT
+        t.team_id,
+        CASE
+            WHEN pgs.start_position IN ('G', 'PG', 'SG') THEN 'G'
+            WHEN pgs.start_position IN ('F', 'SF', 'PF') THEN 'F'
+            WHEN pgs.start_position IN ('C') THEN 'C'
+            ELSE NULL
+        END as opponent_position,
+        COUNT(DISTINCT g.game_id) as games_played,
+        SUM(pgs.points) as total_points,
+        AVG(pgs.points) as avg_points,
+        CASE WHEN SUM(pgs.fg_attempted) > 0 THEN SUM(pgs.fg_made)::numeric / SUM(pgs.fg_attempted) ELSE NULL END as fg_pct,
+        CASE WHEN SUM(pgs.fg3_attempted) > 0 THEN SUM(pgs.fg3_made)::numeric / SUM(pgs.fg3_attempted) ELSE NULL END as fg3_pct,
+        CASE WHEN SUM(pgs.ft_attempted) > 0 THEN SUM(pgs.ft_made)::numeric / SUM(pgs.ft_attempted) ELSE NULL END as ft_pct,
+        SUM(pgs.rebounds) as total_rebounds,
+        AVG(pgs.rebounds) as avg_rebounds,
+        SUM(pgs.assists) as total_assists,
+        AVG(pgs.assists) as avg_assists,
+        SUM(pgs.steals) as total_steals,
+        SUM(pgs.blocks) as total_blocks,
+        SUM(pgs.turnovers) as turnovers_forced
+    FROM teams t
+    JOIN games g ON (g.home_team_id = t.team_id OR g.away_team_id = t.team_id)
+    JOIN player_game_stats pgs ON g.game_id = pgs.game_id
+        AND pgs.team_id != t.team_id  -- Opponent's players
+    WHERE g.season = '{SEASON}'
+        AND g.game_status = 'Final'
+        AND pgs.start_position IS NOT NULL
+        AND pgs.start_position != ''
+    GROUP BY t.team_id,
+        CASE
+            WHEN pgs.start_position IN ('G', 'PG', 'SG') THEN 'G'
+            WHEN pgs.start_position IN ('F', 'SF', 'PF') THEN 'F'
+            WHEN pgs.start_position IN ('C') THEN 'C'
+            ELSE NULL
+        END
+),
+dvp_ranked AS (
+    SELECT
+        td.*,
+        ROW_NUMBER() OVER (PARTITION BY opponent_position ORDER BY avg_points ASC) as points_rank,
+        ROW_NUMBER() OVER (PARTITION BY opponent_position ORDER BY fg_pct ASC) as fg_pct_rank
+    FROM team_defense td
+    WHERE opponent_position IS NOT NULL
+)
+SELECT
+    '{SEASON}' as season,
+    team_id,
+    opponent_position,
+    games_played,
+    ROUND(total_points, 2) as points_allowed,
+    ROUND(avg_points, 2) as points_allowed_per_game,
+    ROUND(fg_pct * 100, 2) as fg_pct_allowed,
+    ROUND(fg3_pct * 100, 2) as fg3_pct_allowed,
+    ROUND(ft_pct * 100, 2) as ft_pct_allowed,
+    ROUND(total_rebounds, 2) as rebounds_allowed,
+    ROUND(total_assists, 2) as assists_allowed,
+    ROUND(total_steals, 2) as steals_allowed,
+    ROUND(total_blocks, 2) as blocks_allowed,
+    ROUND(turnovers_forced, 2) as turnovers_forced,
+    ROUND(avg_rebounds, 2) as rebounds_allowed_per_game,
+    ROUND(avg_assists, 2) as assists_allowed_per_game,
+    points_rank as points_allowed_rank,
+    fg_pct_rank as fg_pct_allowed_rank,
+    NOW() as calculated_at
+FROM dvp_ranked
+WHERE games_played > 0;
+"""
+
+def explain(cur, statement):
+    """EXPLAIN ANALYZE one statement; returns (execution ms, root shared buffers, plan text)"""
+    cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}")
+    lines = [row[0] for row in cur.fetchall()]
+    ms = next(float(l.split(':')[1].split()[0]) for l in lines if l.startswith('Execution Time'))
+    buffers = 0
+    root_buffers = next((l for l in lines if l.strip().startswith('Buffers: shared')), '')
+    for part in root_buffers.replace(',', ' ').split():
+        if part.startswith(('hit=', 'read=')):
+            buffers += int(part.split('=')[1])
+    return ms, buffers, '\n'.join(lines)
+
+def run_variant(conn, name, statements, show_plans):
+    results = []
+    with conn.cursor() as cur:
+        for statement in statements:
+            first_line = statement.splitlines()[0][:60]
+            if not statement.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE', 'CREATE TEMP TABLE')):
+                cur.execute(statement)
+                continue
+            ms, buffers, text = explain(cur, statement)
+            results.append((first_line, ms, buffers))
+            if show_plans:
+                print(f"\n==== {name}: {first_line}\n{text}")
+    conn.rollback()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN ANALYZE legacy vs team_games analytics queries')
+    parser.add_argument('--dsn', required=True, help='Throwaway database (a scratch schema is created and dropped)')
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--plans', action='store_true', help='Print full EXPLAIN ANALYZE output')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch schema afterwards')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    counts = load_dataset(conn, SCHEMA, args.seasons)
+    print(f"-- Loaded {args.seasons} seasons: {counts['games']} games, "
+          f"{counts['player_game_stats']} player rows", file=sys.stderr)
+
+    with conn.cursor() as cur:
+        # Build team_games once, outside the measured transactions
+        for statement in split_statements(analytics.team_games_sql(full=True)):
+            cur.execute(statement)
+        cur.execute("ANALYZE")
+    conn.commit()
+
+    legacy = split_statements(LEGACY_SQL.replace('{SEASON}', analytics.SEASON))
+    current = split_statements(analytics.standings_sql(full=True) + analytics.dvp_sql())
+
+    variants = {
+        'legacy': run_variant(conn, 'legacy', legacy, args.plans),
+        'team_games': run_variant(conn, 'team_games', current, args.plans),
+    }
+
+    print(f"\n{'variant':<11} {'statement':<60} {'ms':>9} {'buffers':>9}")
+    for name, results in variants.items():
+        for first_line, ms, buffers in results:
+            print(f"{name:<11} {first_line:<60} {ms:>9.1f} {buffers:>9}")
+        total = sum(ms for _, ms, _ in results)
+        print(f"{name:<11} {'TOTAL':<60} {total:>9.1f}")
+
+    if not args.keep:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        conn.commit()
+    conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Synthetic NBA dataset for benchmarks
+Creates a scratch schema shaped like production (teams, games,
+player_game_stats, team_standings, defensive_stats_by_position) and fills it
+with any number of seasons of plausible games and box scores via COPY.
+player_game_stats is created unpartitioned, as older databases have it, and
+converted by partitions.ensure_sql() after loading, so every benchmark also
+runs the partition migration.
+
+The last generated season is always SEASON from the analytics script, so the
+analytics SQL runs against it unchanged with search_path set to the schema.
+
+It also renders the same kind of data as API payloads (a scheduleLeagueV2.json
+feed and boxscoretraditionalv2 responses) for benchmarking the sync scripts
+with the network stubbed out.
+"""
+
+import io
+import random
+from datetime import date, timedelta
+
+from partitions import PLAYER_GAME_STATS_PARTITIONS, ensure_sql
+
+SEASON_START_YEAR = 2025  # matches SEASON = '2025-26'
+GAMES_PER_SEASON = 1230
+PLAYERS_PER_GAME = 26
+ROSTER_SIZE = 15
+TEAM_IDS = [1610612737 + i for i in range(30)]
+POSITIONS = ['G', 'G', 'F', 'F', 'C']
+
+SCHEMA_SQL = """
+DROP SCHEMA IF EXISTS {schema} CASCADE;
+CREATE SCHEMA {schema};
+SET search_path TO {schema};
+CREATE TABLE teams (
+    team_id INTEGER PRIMARY KEY, abbreviation VARCHAR(5), conference VARCHAR(10), division VARCHAR(20)
+);
+CREATE TABLE games (
+    game_id VARCHAR(20) PRIMARY KEY, game_date DATE, season VARCHAR(10),
+    home_team_id INTEGER, away_team_id INTEGER, home_team_score INTEGER, away_team_score INTEGER,
+    game_status VARCHAR(20), created_at TIMESTAMP DEFAULT NOW(), updated_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX idx_games_season ON games (season);
+CREATE TABLE player_game_stats (
+    id SERIAL PRIMARY KEY, game_id VARCHAR(20), player_id INTEGER, team_id INTEGER,
+    minutes INTEGER, points INTEGER, rebounds INTEGER, assists INTEGER, steals INTEGER,
+    blocks INTEGER, turnovers INTEGER, fg_made INTEGER, fg_attempted INTEGER, fg_pct NUMERIC(5,3),
+    fg3_made INTEGER, fg3_attempted INTEGER, fg3_pct NUMERIC(5,3), ft_made INTEGER,
+    ft_attempted INTEGER, ft_pct NUMERIC(5,3), start_position VARCHAR(5),
+    created_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX idx_player_game_stats_game ON player_game_stats (game_id);
+CREATE TABLE team_standings (
+    id SERIAL PRIMARY KEY, team_id INTEGER, season_id VARCHAR(10), wins INTEGER, losses INTEGER,
+    win_pct NUMERIC(5,3), games_behind NUMERIC(5,1), home_wins INTEGER, home_losses INTEGER,
+    away_wins INTEGER, away_losses INTEGER, conference VARCHAR(10), division VARCHAR(20),
+    conference_rank INTEGER, division_rank INTEGER, streak VARCHAR(10), last_10 VARCHAR(10),
+    points_for NUMERIC(6,1), points_against NUMERIC(6,1), point_differential NUMERIC(6,1),
+    last_updated TIMESTAMP
+);
+CREATE TABLE defensive_stats_by_position (
+    id SERIAL PRIMARY KEY, season VARCHAR(10), team_id INTEGER, opponent_position VARCHAR(5),
+    games_played INTEGER, points_allowed NUMERIC(10,2), points_allowed_per_game NUMERIC(10,2),
+    fg_pct_allowed NUMERIC(10,2), fg3_pct_allowed NUMERIC(10,2), ft_pct_allowed NUMERIC(10,2),
+    rebounds_allowed NUMERIC(10,2), assists_allowed NUMERIC(10,2), steals_allowed NUMERIC(10,2),
+    blocks_allowed NUMERIC(10,2), turnovers_forced NUMERIC(10,2),
+    rebounds_allowed_per_game NUMERIC(10,2), assists_allowed_per_game NUMERIC(10,2),
+    points_allowed_rank INTEGER, fg_pct_allowed_rank INTEGER, calculated_at TIMESTAMP
+);
+"""
+
+GAME_COLUMNS = ('game_id', 'game_date', 'season', 'home_team_id', 'away_team_id',
+                'home_team_score', 'away_team_score', 'game_status')
+PLAYER_COLUMNS = ('game_id', 'player_id', 'team_id', 'minutes', 'points', 'rebounds', 'assists',
+                  'steals', 'blocks', 'turnovers', 'fg_made', 'fg_attempted', 'fg_pct',
+                  'fg3_made', 'fg3_attempted', 'fg3_pct', 'ft_made', 'ft_attempted', 'ft_pct',
+                  'start_position')
+
+def season_label(start_year):
+    return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+def season_years(seasons):
+    """Start years of the last `seasons` seasons, oldest first"""
+    return list(range(SEASON_START_YEAR - seasons + 1, SEASON_START_YEAR + 1))
+
+def generate_teams():
+    teams = []
+    for i, team_id in enumerate(TEAM_IDS):
+        conference = 'East' if i < 15 else 'West'
+        teams.append((team_id, f"T{i:02d}", conference, f"{conference}{i % 15 // 5}"))
+    return teams
+
+def generate_games(start_year, games_per_season=GAMES_PER_SEASON, seed=0):
+    """One season of Final games, spread over ~165 days from late October"""
+    rng = random.Random(seed * 10007 + start_year)
+    opening = date(start_year, 10, 21)
+    games = []
+    for n in range(games_per_season):
+        home, away = rng.sample(TEAM_IDS, 2)
+        home_score = rng.randint(88, 138)
+        away_score = rng.randint(88, 138)
+        if home_score == away_score:
+            home_score += rng.choice((-1, 1)) * rng.randint(1, 12)
+        games.append((
+            f"002{start_year % 100:02d}{n + 1:05d}",
+            opening + timedelta(days=n * 165 // games_per_season),
+            season_label(start_year),
+            home, away, home_score, away_score, 'Final',
+        ))
+    return games
+
+def generate_player_stats(games, seed=0):
+    """Box score rows: 13 players per team, 5 starters with positions"""
+    rng = random.Random(seed)
+    rows = []
+    for game_id, _, _, home, away, *_ in games:
+        for team_id in (home, away):
+            roster = rng.sample(range(ROSTER_SIZE), PLAYERS_PER_GAME // 2)
+            for slot, player in enumerate(roster):
+                fga, fg3a, fta = rng.randint(0, 24), rng.randint(0, 11), rng.randint(0, 10)
+                fgm, fg3m, ftm = rng.randint(0, fga), rng.randint(0, fg3a), rng.randint(0, fta)
+                fg3m = min(fg3m, fgm)
+                rows.append((
+                    game_id, (team_id - 1610612737) * 100 + player, team_id, rng.randint(0, 42),
+                    2 * (fgm - fg3m) + 3 * fg3m + ftm, rng.randint(0, 15), rng.randint(0, 12),
+                    rng.randint(0, 4), rng.randint(0, 4), rng.randint(0, 6),
+                    fgm, fga, round(fgm / fga, 3) if fga else 0,
+                    fg3m, fg3a, round(fg3m / fg3a, 3) if fg3a else 0,
+                    ftm, fta, round(ftm / fta, 3) if fta else 0,
+                    POSITIONS[slot] if slot < len(POSITIONS) else None,
+                ))
+    return rows
+
+BOX_SCORE_HEADERS = [
+    'GAME_ID', 'TEAM_ID', 'TEAM_ABBREVIATION', 'TEAM_CITY', 'PLAYER_ID', 'PLAYER_NAME',
+    'NICKNAME', 'START_POSITION', 'COMMENT', 'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A',
+    'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TO', 'PF',
+    'PTS', 'PLUS_MINUS',
+]
+TEAM_STATS_HEADERS = [
+    'GAME_ID', 'TEAM_ID', 'TEAM_NAME', 'TEAM_ABBREVIATION', 'TEAM_CITY', 'MIN', 'FGM', 'FGA',
+    'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST',
+    'STL', 'BLK', 'TO', 'PF', 'PTS', 'PLUS_MINUS',
+]
+DNP_PER_TEAM = 2
+
+def generate_schedule(days, end_date, games_per_season=GAMES_PER_SEASON, seed=0):
+    """scheduleLeagueV2-shaped feed with `days` game days ending at end_date, all Final
+
+    Returns (payload, games) where games lists (game_id, home, away) in
+    schedule order. Days carry games_per_season / 165 games on average.
+    """
+    rng = random.Random(seed)
+    per_day = games_per_season / 165
+    game_dates, games = [], []
+    scheduled = 0.0
+    for offset in range(days - 1, -1, -1):
+        day = end_date - timedelta(days=offset)
+        scheduled += per_day
+        entries = []
+        while len(games) < int(scheduled):
+            n = len(games)
+            game_id = f"002{n // games_per_season % 100:02d}{n % games_per_season + 1:05d}"
+            home, away = rng.sample(TEAM_IDS, 2)
+            home_score, away_score = rng.randint(88, 138), rng.randint(88, 138)
+            if home_score == away_score:
+                home_score += 1
+            entries.append({
+                'gameId': game_id,
+                'gameCode': f"{day:%Y%m%d}/T{TEAM_IDS.index(away):02d}T{TEAM_IDS.index(home):02d}",
+                'gameStatus': 3,
+                'gameStatusText': 'Final',
+                'gameSequence': len(entries) + 1,
+                'gameDateEst': f"{day:%Y-%m-%d}T00:00:00Z",
+                'gameDateTimeUTC': f"{day:%Y-%m-%d}T23:30:00Z",
+                'arenaName': f"Arena {TEAM_IDS.index(home):02d}",
+                'arenaCity': f"City {TEAM_IDS.index(home):02d}",
+                'broadcasters': {'nationalTvBroadcasters': [], 'homeTvBroadcasters': [
+                    {'broadcasterId': 1000 + TEAM_IDS.index(home), 'broadcasterDisplay': 'Local TV'}]},
+                'homeTeam': {'teamId': home, 'teamName': f"Team {TEAM_IDS.index(home):02d}",
+                             'teamTricode': f"T{TEAM_IDS.index(home):02d}", 'wins': 0, 'losses': 0,
+                             'score': home_score, 'seed': None},
+                'awayTeam': {'teamId': away, 'teamName': f"Team {TEAM_IDS.index(away):02d}",
+                             'teamTricode': f"T{TEAM_IDS.index(away):02d}", 'wins': 0, 'losses': 0,
+                             'score': away_score, 'seed': None},
+                'pointsLeaders': [{'personId': 200000 + rng.randint(0, 999), 'points': rng.randint(20, 45)}],
+            })
+            games.append((game_id, home, away))
+        game_dates.append({'gameDate': f"{day:%m/%d/%Y} 00:00:00", 'games': entries})
+
+    payload = {
+        'meta': {'version': 1, 'request': 'scheduleLeagueV2.json', 'time': f"{end_date:%Y-%m-%d}"},
+        'leagueSchedule': {'seasonYear': season_label(SEASON_START_YEAR), 'leagueId': '00',
+                           'gameDates': game_dates, 'weeks': [], 'broadcasterList': []},
+    }
+    return payload, games
+
+def generate_box_score(game_id, home, away, seed=0):
+    """boxscoretraditionalv2-shaped response: 13 players + 2 DNPs per team"""
+    rng = random.Random(f"{seed}:{game_id}")
+    player_rows, team_rows = [], []
+    for team_id in (home, away):
+        index = TEAM_IDS.index(team_id)
+        totals = [0] * 17
+        roster = rng.sample(range(ROSTER_SIZE + DNP_PER_TEAM), PLAYERS_PER_GAME // 2 + DNP_PER_TEAM)
+        for slot, player in enumerate(roster):
+            player_id = (team_id - 1610612737) * 100 + player
+            base = [game_id, team_id, f"T{index:02d}", f"City {index:02d}", player_id,
+                    f"Player {player_id}", f"P{player_id}",
+                    POSITIONS[slot] if slot < len(POSITIONS) else '']
+            if slot >= PLAYERS_PER_GAME // 2:
+                player_rows.append(base + ["DNP - Coach's Decision"] + [None] * 20)
+                continue
+            fga, fg3a, fta = rng.randint(0, 24), rng.randint(0, 11), rng.randint(0, 10)
+            fgm, fg3m, ftm = rng.randint(0, fga), rng.randint(0, fg3a), rng.randint(0, fta)
+            fg3m = min(fg3m, fgm)
+            oreb, dreb = rng.randint(0, 5), rng.randint(0, 10)
+            stats = [fgm, fga, round(fgm / fga, 3) if fga else 0.0, fg3m, fg3a,
+                     round(fg3m / fg3a, 3) if fg3a else 0.0, ftm, fta, round(ftm / fta, 3) if fta else 0.0,
+                     oreb, dreb, oreb + dreb, rng.randint(0, 12), rng.randint(0, 4), rng.randint(0, 4),
+                     rng.randint(0, 6), rng.randint(0, 6), 2 * (fgm - fg3m) + 3 * fg3m + ftm,
+                     float(rng.randint(-20, 20))]
+            totals = [t + (v or 0) for t, v in zip(totals, stats[:2] + stats[3:5] + stats[6:8] + stats[9:])]
+            player_rows.append(base + ['', f"{rng.randint(0, 42)}:{rng.randint(0, 59):02d}"] + stats)
+        team_rows.append([game_id, team_id, f"Team {index:02d}", f"T{index:02d}", f"City {index:02d}",
+                          '240:00'] + totals)
+    return {
+        'resource': 'boxscore',
+        'parameters': {'GameID': game_id, 'StartPeriod': 0, 'EndPeriod': 14,
+                       'StartRange': 0, 'EndRange': 28800, 'RangeType': 0},
+        'resultSets': [
+            {'name': 'PlayerStats', 'headers': BOX_SCORE_HEADERS, 'rowSet': player_rows},
+            {'name': 'TeamStats', 'headers': TEAM_STATS_HEADERS, 'rowSet': team_rows},
+        ],
+    }
+
+def _copy(cur, table, columns, rows):
+    data = io.StringIO()
+    for row in rows:
+        data.write('\t'.join('\\N' if v is None else str(v) for v in row) + '\n')
+    data.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", data)
+
+def load_dataset(conn, schema, seasons, games_per_season=GAMES_PER_SEASON, seed=0):
+    """Create schema and load `seasons` seasons into it; returns row counts"""
+    counts = {'games': 0, 'player_game_stats': 0}
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_SQL.format(schema=schema))
+        _copy(cur, 'teams', ('team_id', 'abbreviation', 'conference', 'division'), generate_teams())
+        for start_year in season_years(seasons):
+            games = generate_games(start_year, games_per_season, seed)
+            players = generate_player_stats(games, seed=seed * 10007 + start_year)
+            _copy(cur, 'games', GAME_COLUMNS, games)
+            _copy(cur, 'player_game_stats', PLAYER_COLUMNS, players)
+            counts['games'] += len(games)
+            counts['player_game_stats'] += len(players)
+        cur.execute(ensure_sql(PLAYER_GAME_STATS_PARTITIONS, season_label(SEASON_START_YEAR)))
+        cur.execute("ANALYZE")
+    conn.commit()
+    return counts
+
+def split_statements(sql):
+    """Split generated analytics SQL into individual statements, keeping DO $$ blocks whole"""
+    statements = []
+    pending = ''
+    for chunk in sql.split(';\n'):
+        pending = f"{pending};\n{chunk}" if pending else chunk
+        if pending.count('$$') % 2:
+            continue  # inside a dollar-quoted body
+        code = '\n'.join(line for line in pending.splitlines() if not line.strip().startswith('--'))
+        if code.strip():
+            statements.append(code.strip())
+        pending = ''
+    return statements
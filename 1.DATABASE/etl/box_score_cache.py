@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Box Score Cache
+On-disk cache of Final box score payloads shared by the ETL scripts.
+Payloads are stored gzip-compressed under their SHA-256 content hash and
+indexed by game_id, so a game already fetched on a previous run costs no
+network call and no rate-limit delay.
+
+Usage:
+    python box_score_cache.py stats
+    python box_score_cache.py invalidate 0022500123 0022500124
+    python box_score_cache.py prune --max-age-days 30 --max-mb 200
+    python box_score_cache.py clear
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import argparse
+import threading
+
+# Configuration
+CACHE_DIR = os.environ.get(
+    'ETL_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'statdiscute', 'box_scores')
+)
+MAX_AGE_DAYS = 30
+MAX_SIZE_MB = 200
+
+class BoxScoreCache:
+    """Content-addressed, gzip-compressed payload store keyed by game_id"""
+
+    def __init__(self, path=CACHE_DIR, max_age_days=MAX_AGE_DAYS, max_size_mb=MAX_SIZE_MB):
+        self.path = path
+        self.objects_dir = os.path.join(path, 'objects')
+        self.index_path = os.path.join(path, 'index.json')
+        self.max_age = max_age_days * 86400
+        self.max_size = max_size_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.json.gz")
+
+    def get(self, game_id):
+        """Return the cached payload for game_id, or None on a miss"""
+        with self.lock:
+            entry = self.index.get(game_id)
+            if not entry or time.time() - entry['stored_at'] > self.max_age:
+                self.misses += 1
+                return None
+            try:
+                with gzip.open(self._object_path(entry['sha256']), 'rb') as f:
+                    payload = json.loads(f.read())
+            except (OSError, ValueError):
+                # Missing or corrupt object: drop the entry and refetch
+                del self.index[game_id]
+                self.misses += 1
+                return None
+            entry['accessed_at'] = time.time()
+            self.hits += 1
+            return payload
+
+    def put(self, game_id, payload):
+        """Store a payload. Only call this for games that are Final."""
+        data = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        with self.lock:
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                tmp_path = f"{object_path}.tmp"
+                with gzip.open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, object_path)
+            now = time.time()
+            self.index[game_id] = {
+                'sha256': digest,
+                'size': os.path.getsize(object_path),
+                'stored_at': now,
+                'accessed_at': now,
+            }
+
+    def invalidate(self, game_ids):
+        """Remove entries for the given game_ids; returns how many were dropped"""
+        with self.lock:
+            dropped = [gid for gid in game_ids if self.index.pop(gid, None)]
+        self._collect_garbage()
+        return len(dropped)
+
+    def clear(self):
+        with self.lock:
+            self.index = {}
+        self._collect_garbage()
+
+    def prune(self):
+        """Evict entries past max age, then least recently used until under max size"""
+        now = time.time()
+        with self.lock:
+            for game_id, entry in list(self.index.items()):
+                if now - entry['stored_at'] > self.max_age:
+                    del self.index[game_id]
+
+            by_digest = {}
+            for entry in self.index.values():
+                by_digest[entry['sha256']] = entry['size']
+            total = sum(by_digest.values())
+
+            for game_id, entry in sorted(self.index.items(), key=lambda kv: kv[1]['accessed_at']):
+                if total <= self.max_size:
+                    break
+                del self.index[game_id]
+                if not any(e['sha256'] == entry['sha256'] for e in self.index.values()):
+                    total -= entry['size']
+        self._collect_garbage()
+
+    def _collect_garbage(self):
+        """Delete object files no longer referenced by the index"""
+        with self.lock:
+            live = {entry['sha256'] for entry in self.index.values()}
+            for root, _, files in os.walk(self.objects_dir):
+                for name in files:
+                    if name.split('.')[0] not in live:
+                        os.remove(os.path.join(root, name))
+            self._save_index()
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def save(self):
+        with self.lock:
+            self._save_index()
+
+    def stats(self):
+        with self.lock:
+            digests = {entry['sha256']: entry['size'] for entry in self.index.values()}
+            return {
+                'entries': len(self.index),
+                'objects': len(digests),
+                'bytes': sum(digests.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the on-disk box score cache')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help=f'Cache directory (default: {CACHE_DIR})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Show cache size and entry count')
+    invalidate = subparsers.add_parser('invalidate', help='Drop cached payloads for specific games')
+    invalidate.add_argument('game_ids', nargs='+')
+    prune = subparsers.add_parser('prune', help='Apply age and size eviction')
+    prune.add_argument('--max-age-days', type=int, default=MAX_AGE_DAYS)
+    prune.add_argument('--max-mb', type=int, default=MAX_SIZE_MB)
+    subparsers.add_parser('clear', help='Drop every cached payload')
+    args = parser.parse_args()
+
+    if args.command == 'prune':
+        cache = BoxScoreCache(args.cache_dir, args.max_age_days, args.max_mb)
+    else:
+        cache = BoxScoreCache(args.cache_dir)
+
+    if args.command == 'invalidate':
+        dropped = cache.invalidate(args.game_ids)
+        print(f"-- Invalidated {dropped}/{len(args.game_ids)} cached games", file=sys.stderr)
+    elif args.command == 'prune':
+        cache.prune()
+    elif args.command == 'clear':
+        cache.clear()
+        print("-- Cache cleared", file=sys.stderr)
+
+    stats = cache.stats()
+    print(f"-- Cache: {stats['entries']} games, {stats['objects']} objects, "
+          f"{stats['bytes'] / 1024 / 1024:.1f} MB in {args.cache_dir}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
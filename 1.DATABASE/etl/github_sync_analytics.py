@@ -10,124 +10,228 @@ Usage:
 """
 
 import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from metrics import get_metrics, METRICS_DIR
+from partitions import PLAYER_GAME_STATS_PARTITIONS, TEAM_GAMES_PARTITIONS, ensure_sql
+
 # Configuration
 SEASON = '2025-26'
+SWAP_LOCK_TIMEOUT = '5s'  # longest a shadow swap waits for in-flight readers
+REFRESH_MODES = ('in-place', 'swap')
 
-def main():
-    print("-- GitHub Actions: Analytics Calculation", file=sys.stderr)
-    print(f"-- Season: {SEASON}", file=sys.stderr)
-    print(f"-- Started: {datetime.now().isoformat()}", file=sys.stderr)
+# Partitioned by season (see partitions.py), which adds the indexes
+TEAM_GAMES_DDL = """
+CREATE TABLE IF NOT EXISTS team_games (
+    game_id VARCHAR(20) NOT NULL,
+    team_id INTEGER NOT NULL,
+    opponent_id INTEGER NOT NULL,
+    season VARCHAR(10) NOT NULL,
+    game_date DATE NOT NULL,
+    is_home BOOLEAN NOT NULL,
+    team_score INTEGER,
+    opponent_score INTEGER,
+    game_status VARCHAR(20),
+    updated_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (game_id, team_id, season)
+) PARTITION BY LIST (season);"""
 
-    # Output SQL header
-    print("-- NBA Analytics Calculation SQL")
-    print(f"-- Generated: {datetime.now().isoformat()}")
-    print(f"-- Season: {SEASON}")
-    print("")
-    print("BEGIN;")
-    print("")
-
-    # =========================================================================
-    # Team Standings Calculation
-    # =========================================================================
-    print("-- =================================================================")
-    print("-- TEAM STANDINGS CALCULATION")
-    print("-- =================================================================")
-    print("")
-
-    # Delete existing standings for the season
-    print(f"DELETE FROM team_standings WHERE season_id = '{SEASON}';")
-    print("")
-
-    # Insert calculated standings
-    print(f"""
-INSERT INTO team_standings (
+def team_games_sql(full=False, season=SEASON):
+    """SQL that maintains the team_games fact table (two rows per game)
+
+    Each game appears once from each side (team, opponent, is_home, scores),
+    so standings and DVP can filter by team with an index instead of joining
+    games on home_team_id OR away_team_id. Only games updated since the last
+    refresh are upserted unless full=True.
+
+    Also creates the season's team_games and player_game_stats partitions
+    (migrating unpartitioned tables first), so every later statement can
+    stay within them.
+    """
+    if full:
+        refresh_filter = ""
+        reset = f"DELETE FROM team_games WHERE season = '{season}';\n\n"
+    else:
+        refresh_filter = f"\n    AND COALESCE(g.updated_at, 'epoch') > (SELECT COALESCE(MAX(updated_at), '-infinity') FROM team_games WHERE season = '{season}')"
+        reset = ""
+
+    return f"""
+-- =================================================================
+-- TEAM GAMES FACT TABLE
+-- =================================================================
+{ensure_sql(PLAYER_GAME_STATS_PARTITIONS, season)}{ensure_sql(TEAM_GAMES_PARTITIONS, season, TEAM_GAMES_DDL)}
+
+{reset}INSERT INTO team_games (game_id, team_id, opponent_id, season, game_date, is_home, team_score, opponent_score, game_status, updated_at)
+SELECT g.game_id, side.team_id, side.opponent_id, g.season, g.game_date, side.is_home, side.team_score, side.opponent_score, g.game_status,
+    COALESCE(g.updated_at, 'epoch')
+FROM games g
+CROSS JOIN LATERAL (VALUES
+    (g.home_team_id, g.away_team_id, TRUE, g.home_team_score, g.away_team_score),
+    (g.away_team_id, g.home_team_id, FALSE, g.away_team_score, g.home_team_score)
+) AS side (team_id, opponent_id, is_home, team_score, opponent_score)
+WHERE g.season = '{season}'{refresh_filter}
+ON CONFLICT (game_id, team_id, season) DO UPDATE SET
+    opponent_id = EXCLUDED.opponent_id,
+    game_date = EXCLUDED.game_date,
+    is_home = EXCLUDED.is_home,
+    team_score = EXCLUDED.team_score,
+    opponent_score = EXCLUDED.opponent_score,
+    game_status = EXCLUDED.game_status,
+    updated_at = EXCLUDED.updated_at;
+"""
+
+def standings_sql(full=False, season=SEASON, table='team_standings'):
+    """SQL that refreshes team_standings (or a shadow copy, table) for the season
+
+    Only teams with a game updated since the standings were last computed are
+    recalculated (all teams on the first run or with full=True). Ranks and
+    games behind depend on the whole conference, so they are then re-derived
+    for every team from the stored rows.
+    """
+    if full:
+        changed_teams = "SELECT team_id FROM teams"
+    else:
+        changed_teams = f"""SELECT DISTINCT team_id FROM team_games
+WHERE season = '{season}' AND updated_at > (SELECT COALESCE(MAX(last_updated), '-infinity') FROM {table} WHERE season_id = '{season}')"""
+
+    return f"""
+-- =================================================================
+-- TEAM STANDINGS CALCULATION
+-- =================================================================
+
+-- Teams whose games changed since the last standings refresh
+CREATE TEMP TABLE standings_teams ON COMMIT DROP AS
+{changed_teams};
+
+DELETE FROM {table}
+WHERE season_id = '{season}' AND team_id IN (SELECT team_id FROM standings_teams);
+
+INSERT INTO {table} (
     team_id, season_id, wins, losses, win_pct, games_behind,
     home_wins, home_losses, away_wins, away_losses,
     conference, division, conference_rank, division_rank,
     streak, last_10, points_for, points_against, point_differential,
     last_updated
 )
-WITH team_games AS (
+WITH team_log AS (
     SELECT
         t.team_id,
         t.conference,
         t.division,
-        COUNT(*) FILTER (WHERE
-            (g.home_team_id = t.team_id AND g.home_team_score > g.away_team_score) OR
-            (g.away_team_id = t.team_id AND g.away_team_score > g.home_team_score)
-        ) as wins,
-        COUNT(*) FILTER (WHERE
-            (g.home_team_id = t.team_id AND g.home_team_score < g.away_team_score) OR
-            (g.away_team_id = t.team_id AND g.away_team_score < g.home_team_score)
-        ) as losses,
-        COUNT(*) FILTER (WHERE g.home_team_id = t.team_id AND g.home_team_score > g.away_team_score) as home_wins,
-        COUNT(*) FILTER (WHERE g.home_team_id = t.team_id AND g.home_team_score < g.away_team_score) as home_losses,
-        COUNT(*) FILTER (WHERE g.away_team_id = t.team_id AND g.away_team_score > g.home_team_score) as away_wins,
-        COUNT(*) FILTER (WHERE g.away_team_id = t.team_id AND g.away_team_score < g.home_team_score) as away_losses,
-        AVG(CASE WHEN g.home_team_id = t.team_id THEN g.home_team_score ELSE g.away_team_score END) as points_for,
-        AVG(CASE WHEN g.home_team_id = t.team_id THEN g.away_team_score ELSE g.home_team_score END) as points_against
-    FROM teams t
-    JOIN games g ON (g.home_team_id = t.team_id OR g.away_team_id = t.team_id)
-    WHERE g.season = '{SEASON}' AND g.game_status = 'Final'
-    GROUP BY t.team_id, t.conference, t.division
+        tg.game_id,
+        tg.game_date,
+        tg.is_home,
+        tg.team_score,
+        tg.opponent_score
+    FROM team_games tg
+    JOIN teams t ON t.team_id = tg.team_id
+    WHERE tg.season = '{season}' AND tg.game_status = 'Final'
+        AND tg.team_id IN (SELECT team_id FROM standings_teams)
 ),
-standings_ranked AS (
+team_games AS (
     SELECT
-        tg.*,
-        CASE WHEN (wins + losses) > 0 THEN ROUND(wins::numeric / (wins + losses), 3) ELSE 0 END as win_pct,
-        ROUND((points_for - points_against)::numeric, 1) as point_differential,
-        ROW_NUMBER() OVER (PARTITION BY conference ORDER BY wins DESC, losses ASC) as conference_rank,
-        ROW_NUMBER() OVER (PARTITION BY division ORDER BY wins DESC, losses ASC) as division_rank
-    FROM team_games tg
+        team_id,
+        conference,
+        division,
+        COUNT(*) FILTER (WHERE team_score > opponent_score) as wins,
+        COUNT(*) FILTER (WHERE team_score < opponent_score) as losses,
+        COUNT(*) FILTER (WHERE is_home AND team_score > opponent_score) as home_wins,
+        COUNT(*) FILTER (WHERE is_home AND team_score < opponent_score) as home_losses,
+        COUNT(*) FILTER (WHERE NOT is_home AND team_score > opponent_score) as away_wins,
+        COUNT(*) FILTER (WHERE NOT is_home AND team_score < opponent_score) as away_losses,
+        AVG(team_score) as points_for,
+        AVG(opponent_score) as points_against
+    FROM team_log
+    GROUP BY team_id, conference, division
+),
+results AS (
+    SELECT
+        team_id,
+        CASE WHEN team_score > opponent_score THEN 'W' ELSE 'L' END as result,
+        ROW_NUMBER() OVER recent as recency,
+        FIRST_VALUE(CASE WHEN team_score > opponent_score THEN 'W' ELSE 'L' END) OVER recent as latest_result
+    FROM team_log
+    WHERE team_score <> opponent_score
+    WINDOW recent AS (PARTITION BY team_id ORDER BY game_date DESC, game_id DESC)
+),
+runs AS (
+    SELECT
+        r.*,
+        -- Number of result changes between this game and the latest one
+        COUNT(*) FILTER (WHERE result <> latest_result) OVER (PARTITION BY team_id ORDER BY recency) as breaks
+    FROM results r
+),
+form AS (
+    SELECT
+        team_id,
+        MAX(latest_result) || COUNT(*) FILTER (WHERE breaks = 0) as streak,
+        COUNT(*) FILTER (WHERE recency <= 10 AND result = 'W') || '-' ||
+            COUNT(*) FILTER (WHERE recency <= 10 AND result = 'L') as last_10
+    FROM runs
+    GROUP BY team_id
+)
+SELECT
+    tg.team_id,
+    '{season}' as season_id,
+    tg.wins,
+    tg.losses,
+    CASE WHEN (tg.wins + tg.losses) > 0 THEN ROUND(tg.wins::numeric / (tg.wins + tg.losses), 3) ELSE 0 END as win_pct,
+    NULL as games_behind,
+    tg.home_wins,
+    tg.home_losses,
+    tg.away_wins,
+    tg.away_losses,
+    tg.conference,
+    tg.division,
+    NULL as conference_rank,
+    NULL as division_rank,
+    f.streak,
+    f.last_10,
+    ROUND(tg.points_for, 1) as points_for,
+    ROUND(tg.points_against, 1) as points_against,
+    ROUND((tg.points_for - tg.points_against)::numeric, 1) as point_differential,
+    NOW() as last_updated
+FROM team_games tg
+LEFT JOIN form f ON f.team_id = tg.team_id;
+
+-- Re-rank the whole season from the stored rows
+WITH standings_ranked AS (
+    SELECT
+        team_id,
+        conference,
+        wins,
+        losses,
+        ROW_NUMBER() OVER (PARTITION BY conference ORDER BY wins DESC, losses ASC, team_id) as conference_rank,
+        ROW_NUMBER() OVER (PARTITION BY division ORDER BY wins DESC, losses ASC, team_id) as division_rank
+    FROM {table}
+    WHERE season_id = '{season}'
 ),
 conference_leader AS (
     SELECT conference, MAX(wins) as max_wins
     FROM standings_ranked
     GROUP BY conference
 )
-SELECT
-    sr.team_id,
-    '{SEASON}' as season_id,
-    sr.wins,
-    sr.losses,
-    sr.win_pct,
-    ROUND((cl.max_wins - sr.wins)::numeric + (sr.losses - (SELECT MIN(losses) FROM standings_ranked sr2 WHERE sr2.conference = sr.conference AND sr2.wins = cl.max_wins))::numeric * 0.5, 1) as games_behind,
-    sr.home_wins,
-    sr.home_losses,
-    sr.away_wins,
-    sr.away_losses,
-    sr.conference,
-    sr.division,
-    sr.conference_rank,
-    sr.division_rank,
-    'W1' as streak,
-    '5-5' as last_10,
-    ROUND(sr.points_for, 1) as points_for,
-    ROUND(sr.points_against, 1) as points_against,
-    sr.point_differential,
-    NOW() as last_updated
+UPDATE {table} ts SET
+    conference_rank = sr.conference_rank,
+    division_rank = sr.division_rank,
+    games_behind = ROUND((cl.max_wins - sr.wins)::numeric + (sr.losses - (SELECT MIN(losses) FROM standings_ranked sr2 WHERE sr2.conference = sr.conference AND sr2.wins = cl.max_wins))::numeric * 0.5, 1)
 FROM standings_ranked sr
-JOIN conference_leader cl ON sr.conference = cl.conference;
-""")
-    print("")
-
-    # =========================================================================
-    # Defense vs Position (DVP) Calculation
-    # =========================================================================
-    print("-- =================================================================")
-    print("-- DEFENSE VS POSITION (DVP) CALCULATION")
-    print("-- =================================================================")
-    print("")
-
-    # Delete existing DVP for the season
-    print(f"DELETE FROM defensive_stats_by_position WHERE season = '{SEASON}';")
-    print("")
-
-    # Insert calculated DVP stats
-    print(f"""
-INSERT INTO defensive_stats_by_position (
+JOIN conference_leader cl ON sr.conference = cl.conference
+WHERE ts.season_id = '{season}' AND ts.team_id = sr.team_id;
+"""
+
+def dvp_sql(season=SEASON, table='defensive_stats_by_position'):
+    """SQL that rebuilds defensive_stats_by_position (or a shadow copy, table) for the season"""
+    return f"""
+-- =================================================================
+-- DEFENSE VS POSITION (DVP) CALCULATION
+-- =================================================================
+
+DELETE FROM {table} WHERE season = '{season}';
+
+INSERT INTO {table} (
     season, team_id, opponent_position, games_played,
     points_allowed, points_allowed_per_game,
     fg_pct_allowed, fg3_pct_allowed, ft_pct_allowed,
@@ -143,14 +247,14 @@ WITH position_mapping AS (
 ),
 team_defense AS (
     SELECT
-        t.team_id,
+        tg.team_id,
         CASE
             WHEN pgs.start_position IN ('G', 'PG', 'SG') THEN 'G'
             WHEN pgs.start_position IN ('F', 'SF', 'PF') THEN 'F'
             WHEN pgs.start_position IN ('C') THEN 'C'
             ELSE NULL
         END as opponent_position,
-        COUNT(DISTINCT g.game_id) as games_played,
+        COUNT(DISTINCT tg.game_id) as games_played,
         SUM(pgs.points) as total_points,
         AVG(pgs.points) as avg_points,
         CASE WHEN SUM(pgs.fg_attempted) > 0 THEN SUM(pgs.fg_made)::numeric / SUM(pgs.fg_attempted) ELSE NULL END as fg_pct,
@@ -163,15 +267,15 @@ team_defense AS (
         SUM(pgs.steals) as total_steals,
         SUM(pgs.blocks) as total_blocks,
         SUM(pgs.turnovers) as turnovers_forced
-    FROM teams t
-    JOIN games g ON (g.home_team_id = t.team_id OR g.away_team_id = t.team_id)
-    JOIN player_game_stats pgs ON g.game_id = pgs.game_id
-        AND pgs.team_id != t.team_id  -- Opponent's players
-    WHERE g.season = '{SEASON}'
-        AND g.game_status = 'Final'
+    FROM team_games tg
+    JOIN player_game_stats pgs ON pgs.game_id = tg.game_id
+        AND pgs.team_id = tg.opponent_id  -- Opponent's players
+        AND pgs.season = '{season}'
+    WHERE tg.season = '{season}'
+        AND tg.game_status = 'Final'
         AND pgs.start_position IS NOT NULL
         AND pgs.start_position != ''
-    GROUP BY t.team_id,
+    GROUP BY tg.team_id,
         CASE
             WHEN pgs.start_position IN ('G', 'PG', 'SG') THEN 'G'
             WHEN pgs.start_position IN ('F', 'SF', 'PF') THEN 'F'
@@ -182,13 +286,13 @@ team_defense AS (
 dvp_ranked AS (
     SELECT
         td.*,
-        ROW_NUMBER() OVER (PARTITION BY opponent_position ORDER BY avg_points ASC) as points_rank,
-        ROW_NUMBER() OVER (PARTITION BY opponent_position ORDER BY fg_pct ASC) as fg_pct_rank
+        ROW_NUMBER() OVER (PARTITION BY opponent_position ORDER BY avg_points ASC, team_id) as points_rank,
+        ROW_NUMBER() OVER (PARTITION BY opponent_position ORDER BY fg_pct ASC, team_id) as fg_pct_rank
     FROM team_defense td
     WHERE opponent_position IS NOT NULL
 )
 SELECT
-    '{SEASON}' as season,
+    '{season}' as season,
     team_id,
     opponent_position,
     games_played,
@@ -209,14 +313,316 @@ SELECT
     NOW() as calculated_at
 FROM dvp_ranked
 WHERE games_played > 0;
-""")
-    print("")
+"""
+
+PLAYER_AGGREGATE_COLUMNS = (
+    'team_id', 'games_played', 'last_game_date',
+    'minutes', 'points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+    'fg_made', 'fg_attempted', 'fg3_made', 'fg3_attempted', 'ft_made', 'ft_attempted',
+    'minutes_per_game', 'points_per_game', 'rebounds_per_game', 'assists_per_game',
+    'steals_per_game', 'blocks_per_game', 'turnovers_per_game',
+    'fg_pct', 'fg3_pct', 'ft_pct',
+    'last5_minutes', 'last5_points', 'last5_rebounds', 'last5_assists', 'last5_fg_pct',
+    'last10_minutes', 'last10_points', 'last10_rebounds', 'last10_assists', 'last10_fg_pct',
+    'updated_at',
+)
+
+def player_aggregates_sql(full=False, season=SEASON):
+    """SQL that maintains player_aggregates (one row per player per season)
+
+    Season totals, per-game averages, shooting percentages and last-5/last-10
+    averages over games actually played (minutes > 0). Only players with box
+    score rows loaded since the last refresh are recomputed, from their whole
+    season log, so a replaced box score is handled like a new one (all
+    players on the first run or with full=True).
+    """
+    if full:
+        changed_players = f"""SELECT DISTINCT pgs.player_id FROM player_game_stats pgs
+WHERE pgs.season = '{season}'"""
+        reset = f"DELETE FROM player_aggregates WHERE season = '{season}';\n\n"
+    else:
+        changed_players = f"""SELECT DISTINCT pgs.player_id FROM player_game_stats pgs
+WHERE pgs.season = '{season}' AND pgs.created_at > (SELECT COALESCE(MAX(updated_at), '-infinity') FROM player_aggregates WHERE season = '{season}')"""
+        reset = ""
+
+    columns = ', '.join(PLAYER_AGGREGATE_COLUMNS)
+    updates = ',\n    '.join(f"{c} = EXCLUDED.{c}" for c in PLAYER_AGGREGATE_COLUMNS)
+
+    def window(n, column):
+        if column == 'fg_pct':
+            return (f"CASE WHEN SUM(fg_attempted) FILTER (WHERE recency <= {n}) > 0 THEN ROUND("
+                    f"SUM(fg_made) FILTER (WHERE recency <= {n})::numeric / "
+                    f"SUM(fg_attempted) FILTER (WHERE recency <= {n}), 3) END")
+        return f"ROUND(AVG({column}) FILTER (WHERE recency <= {n}), 1)"
+
+    windows = ',\n    '.join(window(n, column) for n in (5, 10)
+                              for column in ('minutes', 'points', 'rebounds', 'assists', 'fg_pct'))
+
+    return f"""
+-- =================================================================
+-- PLAYER AGGREGATES
+-- =================================================================
+
+CREATE TABLE IF NOT EXISTS player_aggregates (
+    season VARCHAR(10) NOT NULL,
+    player_id INTEGER NOT NULL,
+    team_id INTEGER,
+    games_played INTEGER NOT NULL,
+    last_game_date DATE,
+    minutes INTEGER, points INTEGER, rebounds INTEGER, assists INTEGER,
+    steals INTEGER, blocks INTEGER, turnovers INTEGER,
+    fg_made INTEGER, fg_attempted INTEGER, fg3_made INTEGER, fg3_attempted INTEGER,
+    ft_made INTEGER, ft_attempted INTEGER,
+    minutes_per_game NUMERIC(4,1), points_per_game NUMERIC(4,1), rebounds_per_game NUMERIC(4,1),
+    assists_per_game NUMERIC(4,1), steals_per_game NUMERIC(4,1), blocks_per_game NUMERIC(4,1),
+    turnovers_per_game NUMERIC(4,1),
+    fg_pct NUMERIC(4,3), fg3_pct NUMERIC(4,3), ft_pct NUMERIC(4,3),
+    last5_minutes NUMERIC(4,1), last5_points NUMERIC(4,1), last5_rebounds NUMERIC(4,1),
+    last5_assists NUMERIC(4,1), last5_fg_pct NUMERIC(4,3),
+    last10_minutes NUMERIC(4,1), last10_points NUMERIC(4,1), last10_rebounds NUMERIC(4,1),
+    last10_assists NUMERIC(4,1), last10_fg_pct NUMERIC(4,3),
+    updated_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (season, player_id)
+);
+-- Team rosters, scoring leaderboards and recent-form lists
+CREATE INDEX IF NOT EXISTS idx_player_aggregates_team ON player_aggregates (season, team_id);
+CREATE INDEX IF NOT EXISTS idx_player_aggregates_points ON player_aggregates (season, points_per_game DESC);
+CREATE INDEX IF NOT EXISTS idx_player_aggregates_last5 ON player_aggregates (season, last5_points DESC);
+
+-- Players with box score rows loaded since the last refresh
+CREATE TEMP TABLE aggregate_players ON COMMIT DROP AS
+{changed_players};
+
+{reset}INSERT INTO player_aggregates (season, player_id, {columns})
+WITH player_log AS (
+    SELECT
+        pgs.*,
+        g.game_date,
+        ROW_NUMBER() OVER (PARTITION BY pgs.player_id ORDER BY g.game_date DESC, g.game_id DESC) as recency
+    FROM player_game_stats pgs
+    JOIN games g ON g.game_id = pgs.game_id
+    WHERE pgs.season = '{season}'
+        AND g.season = '{season}'
+        AND pgs.minutes > 0
+        AND pgs.player_id IN (SELECT player_id FROM aggregate_players)
+)
+SELECT
+    '{season}' as season,
+    player_id,
+    (ARRAY_AGG(team_id ORDER BY recency))[1] as team_id,
+    COUNT(*) as games_played,
+    MAX(game_date) as last_game_date,
+    SUM(minutes), SUM(points), SUM(rebounds), SUM(assists),
+    SUM(steals), SUM(blocks), SUM(turnovers),
+    SUM(fg_made), SUM(fg_attempted), SUM(fg3_made), SUM(fg3_attempted),
+    SUM(ft_made), SUM(ft_attempted),
+    ROUND(AVG(minutes), 1), ROUND(AVG(points), 1), ROUND(AVG(rebounds), 1),
+    ROUND(AVG(assists), 1), ROUND(AVG(steals), 1), ROUND(AVG(blocks), 1),
+    ROUND(AVG(turnovers), 1),
+    CASE WHEN SUM(fg_attempted) > 0 THEN ROUND(SUM(fg_made)::numeric / SUM(fg_attempted), 3) END,
+    CASE WHEN SUM(fg3_attempted) > 0 THEN ROUND(SUM(fg3_made)::numeric / SUM(fg3_attempted), 3) END,
+    CASE WHEN SUM(ft_attempted) > 0 THEN ROUND(SUM(ft_made)::numeric / SUM(ft_attempted), 3) END,
+    {windows},
+    NOW() as updated_at
+FROM player_log
+GROUP BY player_id
+ON CONFLICT (season, player_id) DO UPDATE SET
+    {updates};
+"""
+
+def shadow_build_sql(table, season_column, build_sql, season=SEASON):
+    """SQL that builds {table}_shadow: other seasons copied over, this season rebuilt
+
+    Only reads the live table, so site queries are never blocked by it.
+    """
+    shadow = f"{table}_shadow"
+    return f"""
+-- =================================================================
+-- SHADOW BUILD: {table}
+-- =================================================================
+
+DROP TABLE IF EXISTS {shadow};
+CREATE TABLE {shadow} (LIKE {table} INCLUDING ALL);
+INSERT INTO {shadow} SELECT * FROM {table} WHERE {season_column} IS DISTINCT FROM '{season}';
+{build_sql}
+ANALYZE {shadow};
+"""
+
+def swap_sql(table, lock_timeout=SWAP_LOCK_TIMEOUT):
+    """SQL that atomically replaces table with {table}_shadow
+
+    Privileges and the id sequence are carried over to the shadow first; the
+    renames only wait lock_timeout for in-flight readers, so a long-running
+    query makes the swap fail instead of queueing every reader behind it.
+    Index names are reset from {table}_shadow_* to {table}_* afterwards.
+    """
+    shadow = f"{table}_shadow"
+    return f"""
+-- =================================================================
+-- SWAP: {shadow} -> {table}
+-- =================================================================
+
+SET LOCAL lock_timeout = '{lock_timeout}';
+DO $$
+DECLARE
+    grant_row RECORD;
+    sequence_name TEXT := pg_get_serial_sequence('{table}', 'id');
+BEGIN
+    FOR grant_row IN
+        SELECT grantee, privilege_type FROM information_schema.role_table_grants
+        WHERE table_schema = current_schema() AND table_name = '{table}' AND grantee <> current_user
+    LOOP
+        EXECUTE format('GRANT %s ON {shadow} TO %s', grant_row.privilege_type,
+            CASE WHEN grant_row.grantee = 'PUBLIC' THEN 'PUBLIC' ELSE quote_ident(grant_row.grantee) END);
+    END LOOP;
+    IF sequence_name IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY {shadow}.id', sequence_name);
+    END IF;
+END $$;
+
+ALTER TABLE {table} RENAME TO {table}_old;
+ALTER TABLE {shadow} RENAME TO {table};
+DROP TABLE {table}_old;
+
+DO $$
+DECLARE
+    index_name TEXT;
+BEGIN
+    FOR index_name IN
+        SELECT indexname FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = '{table}' AND indexname LIKE '{shadow}%'
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', index_name,
+            '{table}' || substr(index_name, length('{shadow}') + 1));
+    END LOOP;
+END $$;
+"""
+
+def swap_refresh(full=False, season=SEASON):
+    """Shadow-table refresh as independent chains of transactions
+
+    Returns [(label, [(step, sql), ...])]: standings and DVP each build their
+    shadow in one transaction and swap it in with a second, short one; player
+    aggregates are upserted in place (only changed players' rows are touched).
+    The chains share nothing but team_games, so they can run in parallel once
+    it is refreshed.
+    """
+    return [
+        ('Standings', [
+            ('build', shadow_build_sql('team_standings', 'season_id',
+                                       standings_sql(full=True, season=season, table='team_standings_shadow'),
+                                       season)),
+            ('swap', swap_sql('team_standings')),
+        ]),
+        ('DVP', [
+            ('build', shadow_build_sql('defensive_stats_by_position', 'season',
+                                       dvp_sql(season=season, table='defensive_stats_by_position_shadow'),
+                                       season)),
+            ('swap', swap_sql('defensive_stats_by_position')),
+        ]),
+        ('Player aggregates', [
+            ('upsert', player_aggregates_sql(full, season)),
+        ]),
+    ]
+
+def run_swap_refresh(loader, full=False, season=SEASON):
+    """Refresh team_games, then run the standings, DVP and player aggregate chains in parallel"""
+    metrics = get_metrics()
+    with metrics.stage('team_games'):
+        loader.execute(team_games_sql(full, season), label='team_games')
+
+    def run_chain(label, steps):
+        with metrics.stage(f"refresh_{label.lower().replace(' ', '_')}"):
+            for step, sql in steps:
+                loader.execute(sql, label=f"{label} {step}")
+
+    chains = swap_refresh(full, season)
+    with ThreadPoolExecutor(max_workers=len(chains)) as executor:
+        for future in [executor.submit(run_chain, label, steps) for label, steps in chains]:
+            future.result()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate standings and DVP analytics SQL')
+    parser.add_argument('--dsn', help='Run the analytics directly against this database instead of printing SQL')
+    parser.add_argument('--full', action='store_true',
+                        help='Rebuild team_games and standings for the whole season, not just changed games')
+    parser.add_argument('--metrics-dir', default=METRICS_DIR,
+                        help='Write analytics.json / analytics.prom run metrics here (default: $ETL_METRICS_DIR)')
+    parser.add_argument('--engine', choices=('sql', 'pandas'), default='sql',
+                        help='sql: aggregate on the database server; pandas: snapshot and aggregate in-process (needs --dsn)')
+    parser.add_argument('--refresh', choices=REFRESH_MODES, default='in-place',
+                        help='in-place: delete and rebuild in one transaction; swap: build shadow tables '
+                             'and rename them into place (standings and DVP in parallel with --dsn)')
+    args = parser.parse_args()
+    if args.engine == 'pandas' and not args.dsn:
+        parser.error('--engine pandas requires --dsn')
+    if args.engine == 'pandas' and args.refresh == 'swap':
+        parser.error('--refresh swap is only supported by --engine sql')
+    return args
+
+def main():
+    args = parse_args()
+    metrics = get_metrics()
+    metrics.directory = args.metrics_dir
+
+    print("-- GitHub Actions: Analytics Calculation", file=sys.stderr)
+    print(f"-- Season: {SEASON}", file=sys.stderr)
+    print(f"-- Started: {datetime.now().isoformat()}", file=sys.stderr)
+
+    sql = team_games_sql(args.full) + standings_sql(args.full) + dvp_sql() + player_aggregates_sql(args.full)
 
-    print("COMMIT;")
-    print("")
-    print("-- Analytics calculation complete")
+    if args.engine == 'pandas':
+        from db_loader import connect
+        import analytics_pandas
+        loader = connect(args.dsn)
+        # team_games as the SQL engine builds it (snapshots and DVP consumers read it),
+        # which also creates the season's partitions player aggregates read
+        with metrics.stage('team_games'):
+            loader.execute(team_games_sql(args.full), label='team_games')
+        analytics_pandas.run(loader, SEASON)
+        with metrics.stage('player_aggregates'):
+            loader.execute(player_aggregates_sql(args.full), label='Player aggregates')
+        loader.close()
+    elif args.refresh == 'swap' and args.dsn:
+        from db_loader import connect
+        loader = connect(args.dsn)
+        with metrics.stage('analytics'):
+            run_swap_refresh(loader, args.full)
+        loader.close()
+    elif args.refresh == 'swap':
+        # One transaction per step; psql runs the chains one after the other
+        print("-- NBA Analytics Calculation SQL (shadow swap)")
+        print(f"-- Generated: {datetime.now().isoformat()}")
+        print(f"-- Season: {SEASON}")
+        steps = [team_games_sql(args.full)] + [sql for _, chain in swap_refresh(args.full) for _, sql in chain]
+        for sql in steps:
+            print("")
+            print("BEGIN;")
+            print(sql)
+            print("COMMIT;")
+        print("")
+        print("-- Analytics calculation complete")
+    elif args.dsn:
+        from db_loader import connect
+        loader = connect(args.dsn)
+        # Single transaction, as in the psql output
+        with metrics.stage('analytics'):
+            loader.execute(sql, label='Analytics')
+        loader.close()
+    else:
+        # Output SQL header
+        print("-- NBA Analytics Calculation SQL")
+        print(f"-- Generated: {datetime.now().isoformat()}")
+        print(f"-- Season: {SEASON}")
+        print("")
+        print("BEGIN;")
+        print(sql)
+        print("COMMIT;")
+        print("")
+        print("-- Analytics calculation complete")
 
     print(f"-- Completed: {datetime.now().isoformat()}", file=sys.stderr)
 
 if __name__ == '__main__':
-    main()
+    with get_metrics('analytics').reporting():
+        main()
@@ -9,16 +9,28 @@ Usage:
     ssh vps "docker exec -i postgres psql -U user -d db" < games.sql
 """
 
+import os
 import sys
-import time
-import requests
+import json
+import argparse
+from urllib.parse import urlsplit
 from datetime import datetime, timedelta
 
+from http_client import get_client
+from metrics import get_metrics, METRICS_DIR
+from sync_manifest import SyncManifest, content_hash, MANIFEST_PATH
+from sql_output import GAMES, OUTPUT_FORMATS, make_writer
+
 # Configuration
 SEASON = '2025-26'
 SEASON_YEAR = '2025'  # For scoreboard API
-MAX_RETRIES = 3
-RETRY_DELAY = 5  # seconds
+SCHEDULE_URL = "https://cdn.nba.com/static/json/staticData/scheduleLeagueV2.json"
+SCOREBOARD_URL = "https://cdn.nba.com/static/json/liveData/scoreboard/todaysScoreboard_00.json"
+SCHEDULE_PATH = os.environ.get(
+    'ETL_SCHEDULE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'statdiscute', 'scheduleLeagueV2.json')
+)
+CHUNK_SIZE = 64 * 1024
 
 # Headers for NBA CDN (simpler, less likely to be blocked)
 HEADERS = {
@@ -35,38 +47,225 @@ def escape_sql(value):
         return "'" + value.replace("'", "''") + "'"
     return str(value)
 
-def fetch_schedule():
-    """Fetch season schedule from NBA CDN (more reliable than stats.nba.com)"""
-    # Use the CDN schedule endpoint which is less restricted
-    url = f"https://cdn.nba.com/static/json/staticData/scheduleLeagueV2.json"
+def _read_schedule_meta(path):
+    try:
+        with open(f"{path}.meta") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _conditional_headers(validators):
+    """HEADERS plus If-None-Match / If-Modified-Since from a previous response"""
+    headers = dict(HEADERS)
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+def _validators(response):
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+def fetch_schedule(path=SCHEDULE_PATH):
+    """Fetch season schedule from NBA CDN (more reliable than stats.nba.com)
+
+    The schedule is kept in a local copy at path. Requests are conditional on
+    its ETag/Last-Modified, so an unchanged schedule costs a 304; a changed one
+    is streamed straight to disk. Returns the local copy's path.
+    """
+    meta = _read_schedule_meta(path) if os.path.exists(path) else {}
+    headers = _conditional_headers(meta)
+
+    # Connection reuse, retries and backoff are handled by the shared client
+    with get_client().get(SCHEDULE_URL, headers=headers, timeout=30, stream=True) as response:
+        if response.status_code == 304:
+            print("-- Schedule unchanged (304), using local copy", file=sys.stderr)
+            return path
+        response.raise_for_status()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        size = 0
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, path)
+
+        with open(f"{path}.meta", 'w') as f:
+            json.dump(_validators(response), f)
+        get_metrics().inc('http_bytes', size, host=urlsplit(SCHEDULE_URL).netloc)
+        print(f"-- Schedule downloaded ({size / 1024:.0f} KB)", file=sys.stderr)
+        return path
 
-    for attempt in range(1, MAX_RETRIES + 1):
+def iter_game_dates(stream):
+    """Yield leagueSchedule.gameDates entries one at a time from a text stream
+
+    Only the current entry is held in memory, so callers can stop reading as
+    soon as they are past the dates they need.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = -1
+
+    # Seek to the opening bracket of the gameDates array
+    while pos < 0:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        buffer += chunk
+        key = buffer.find('"gameDates"')
+        if key < 0:
+            buffer = buffer[-len('"gameDates"'):]
+            continue
+        pos = buffer.find('[', key)
+        if pos < 0:
+            buffer = buffer[key:]
+    pos += 1
+
+    while True:
+        # Skip separators between entries
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
         try:
-            print(f"-- Attempt {attempt}/{MAX_RETRIES}...", file=sys.stderr)
-            response = requests.get(url, headers=HEADERS, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"-- Attempt {attempt} failed: {e}", file=sys.stderr)
-            if attempt < MAX_RETRIES:
-                print(f"-- Retrying in {RETRY_DELAY} seconds...", file=sys.stderr)
-                time.sleep(RETRY_DELAY)
-            else:
-                raise
-
-def fetch_scoreboard(date_str):
-    """Fetch scoreboard for a specific date"""
-    url = f"https://cdn.nba.com/static/json/liveData/scoreboard/todaysScoreboard_00.json"
-    # For historical dates, use a different endpoint
+            if pos >= len(buffer):
+                raise ValueError('need more data')
+            entry, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield entry
+        buffer = buffer[end:]
+        pos = 0
+
+def parse_game_date(date_entry):
+    """Parse a gameDates entry's date, or None if it is malformed"""
+    game_date_str = date_entry.get('gameDate', '')[:10]  # Format: YYYY-MM-DD or MM/DD/YYYY HH:MM:SS AM
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        if response.status_code == 200:
-            return response.json()
-    except:
-        pass
-    return None
+        if '/' in game_date_str:
+            # Parse MM/DD/YYYY format
+            return datetime.strptime(game_date_str.split()[0], '%m/%d/%Y')
+        return datetime.strptime(game_date_str, '%Y-%m-%d')
+    except ValueError:
+        return None
+
+def parse_date_games(date_entry, game_date):
+    """Extract game rows from one gameDates entry"""
+    games = []
+    for game in date_entry.get('games', []):
+        game_id = game.get('gameId', '')
+        if not game_id:
+            continue
+
+        home_team = game.get('homeTeam', {})
+        away_team = game.get('awayTeam', {})
+        home_team_id = home_team.get('teamId')
+        away_team_id = away_team.get('teamId')
+
+        if not home_team_id or not away_team_id:
+            continue
+
+        home_score = home_team.get('score')
+        away_score = away_team.get('score')
+
+        # Determine game status
+        game_status_code = game.get('gameStatus', 1)
+        if game_status_code == 3:  # Final
+            game_status = 'Final'
+        elif game_status_code == 2:  # In Progress
+            game_status = 'In Progress'
+        else:
+            game_status = 'Scheduled'
+
+        games.append({
+            'game_id': game_id,
+            'game_date': game_date.strftime('%Y-%m-%d'),
+            'home_team_id': home_team_id,
+            'away_team_id': away_team_id,
+            'home_score': home_score if home_score else 'NULL',
+            'away_score': away_score if away_score else 'NULL',
+            'game_status': game_status
+        })
+    return games
+
+def read_games(schedule_path, cutoff_days=7):
+    """Games from a local schedule copy up to cutoff_days ahead
+
+    Returns (number of gameDates entries read, game dicts). The schedule is
+    streamed; gameDates is chronological, so reading stops past the cutoff.
+    """
+    games = []
+    game_date_count = 0
+    cutoff_date = datetime.now() + timedelta(days=cutoff_days)
+
+    with open(schedule_path, encoding='utf-8') as schedule_file:
+        for date_entry in iter_game_dates(schedule_file):
+            game_date_count += 1
+            game_date = parse_game_date(date_entry)
+            if game_date is None:
+                continue
+
+            # Only include games up to cutoff
+            if game_date > cutoff_date:
+                break
+
+            games.extend(parse_date_games(date_entry, game_date))
+    return game_date_count, games
+
+def game_row(g):
+    """GAMES row for a parsed game"""
+    return (
+        g['game_id'],
+        g['game_date'],
+        SEASON,
+        g['home_team_id'],
+        g['away_team_id'],
+        g['home_score'] if g['home_score'] != 'NULL' else None,
+        g['away_score'] if g['away_score'] != 'NULL' else None,
+        g['game_status'],
+    )
+
+def fetch_scoreboard(validators=None):
+    """Fetch today's scoreboard from the NBA CDN
+
+    The request is conditional on validators, the ETag/Last-Modified of the
+    previous response. Returns (payload, validators); payload is None when the
+    scoreboard is unchanged (304). Request errors are raised to the caller.
+    """
+    validators = validators or {}
+    response = get_client().get(SCOREBOARD_URL, headers=_conditional_headers(validators), timeout=15)
+    if response.status_code == 304:
+        return None, validators
+    response.raise_for_status()
+    return response.json(), _validators(response)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate games SQL from the NBA CDN schedule')
+    parser.add_argument('--manifest', default=MANIFEST_PATH,
+                        help=f'Sync manifest path (default: {MANIFEST_PATH})')
+    parser.add_argument('--full', action='store_true',
+                        help='Emit every game in the window, even if unchanged since the last load')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='insert',
+                        help='insert: one INSERT per row; copy: COPY into a staging table + one upsert')
+    parser.add_argument('--dsn', help='Load directly into this database instead of printing SQL')
+    parser.add_argument('--metrics-dir', default=METRICS_DIR,
+                        help='Write games.json / games.prom run metrics here (default: $ETL_METRICS_DIR)')
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    metrics = get_metrics()
+    metrics.directory = args.metrics_dir
+
     print("-- GitHub Actions: NBA Games Sync", file=sys.stderr)
     print(f"-- Season: {SEASON}", file=sys.stderr)
     print(f"-- Started: {datetime.now().isoformat()}", file=sys.stderr)
@@ -75,108 +274,71 @@ def main():
     print(f"-- Fetching schedule from NBA CDN...", file=sys.stderr)
 
     try:
-        schedule_data = fetch_schedule()
+        with metrics.stage('fetch_schedule'):
+            schedule_path = fetch_schedule()
     except Exception as e:
-        print(f"-- ERROR: Failed to fetch schedule after {MAX_RETRIES} attempts: {e}", file=sys.stderr)
+        print(f"-- ERROR: Failed to fetch schedule: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Parse schedule data
-    league_schedule = schedule_data.get('leagueSchedule', {})
-    game_dates = league_schedule.get('gameDates', [])
+    # Collect all games
+    with metrics.stage('parse_schedule'):
+        game_date_count, games = read_games(schedule_path)
 
-    if not game_dates:
+    if not game_date_count:
         print(f"-- No games found in schedule", file=sys.stderr)
         print("-- SQL output empty (no games to sync)")
         sys.exit(0)
 
-    # Collect all games
-    games = []
-    current_date = datetime.now()
-    cutoff_date = current_date + timedelta(days=7)
-
-    for date_entry in game_dates:
-        game_date_str = date_entry.get('gameDate', '')[:10]  # Format: YYYY-MM-DD or MM/DD/YYYY HH:MM:SS AM
-        if '/' in game_date_str:
-            # Parse MM/DD/YYYY format
-            try:
-                game_date = datetime.strptime(game_date_str.split()[0], '%m/%d/%Y')
-            except:
-                continue
-        else:
-            try:
-                game_date = datetime.strptime(game_date_str, '%Y-%m-%d')
-            except:
-                continue
-
-        # Only include games up to cutoff
-        if game_date > cutoff_date:
-            continue
-
-        for game in date_entry.get('games', []):
-            game_id = game.get('gameId', '')
-            if not game_id:
-                continue
-
-            home_team = game.get('homeTeam', {})
-            away_team = game.get('awayTeam', {})
-            home_team_id = home_team.get('teamId')
-            away_team_id = away_team.get('teamId')
-
-            if not home_team_id or not away_team_id:
-                continue
-
-            home_score = home_team.get('score')
-            away_score = away_team.get('score')
-
-            # Determine game status
-            game_status_code = game.get('gameStatus', 1)
-            if game_status_code == 3:  # Final
-                game_status = 'Final'
-            elif game_status_code == 2:  # In Progress
-                game_status = 'In Progress'
-            else:
-                game_status = 'Scheduled'
-
-            games.append({
-                'game_id': game_id,
-                'game_date': game_date.strftime('%Y-%m-%d'),
-                'home_team_id': home_team_id,
-                'away_team_id': away_team_id,
-                'home_score': home_score if home_score else 'NULL',
-                'away_score': away_score if away_score else 'NULL',
-                'game_status': game_status
-            })
-
     print(f"-- Found {len(games)} games", file=sys.stderr)
 
-    # Output SQL header
-    print("-- NBA Games Sync SQL")
-    print(f"-- Generated: {datetime.now().isoformat()}")
-    print(f"-- Season: {SEASON}")
-    print(f"-- Games: {len(games)}")
-    print("")
-    print("BEGIN;")
-    print("")
-
-    # Process each game
+    # Only emit games that are new or changed since the last successful load
+    manifest = SyncManifest(args.manifest)
+    changed = []
     for g in games:
-        home_score_sql = g['home_score'] if g['home_score'] != 'NULL' else 'NULL'
-        away_score_sql = g['away_score'] if g['away_score'] != 'NULL' else 'NULL'
-
-        print(f"""INSERT INTO games (game_id, game_date, season, home_team_id, away_team_id, home_team_score, away_team_score, game_status, updated_at)
-VALUES ('{g['game_id']}', '{g['game_date']}', '{SEASON}', {g['home_team_id']}, {g['away_team_id']}, {home_score_sql}, {away_score_sql}, '{g['game_status']}', NOW())
-ON CONFLICT (game_id) DO UPDATE SET
-    home_team_score = EXCLUDED.home_team_score,
-    away_team_score = EXCLUDED.away_team_score,
-    game_status = EXCLUDED.game_status,
-    updated_at = EXCLUDED.updated_at;""")
+        digest = content_hash(g)
+        if args.full or not manifest.is_current('games', g['game_id'], digest):
+            changed.append(g)
+            manifest.record('games', g['game_id'], digest)
+    print(f"-- {len(changed)} new or changed, {len(games) - len(changed)} unchanged", file=sys.stderr)
+    games = changed
+
+    loader = None
+    if args.dsn:
+        from db_loader import connect
+        loader = connect(args.dsn)
+        writer = loader.writer(GAMES)
+    else:
+        # Output SQL header
+        print("-- NBA Games Sync SQL")
+        print(f"-- Generated: {datetime.now().isoformat()}")
+        print(f"-- Season: {SEASON}")
+        print(f"-- Games: {len(games)}")
+        print("")
+        print("BEGIN;")
         print("")
+        writer = make_writer(args.format, GAMES)
 
-    print("COMMIT;")
-    print("")
-    print(f"-- Processed {len(games)} games")
+    # Process each game
+    with metrics.stage('load' if loader else 'emit_sql'):
+        writer.begin()
+        for g in games:
+            writer.write(game_row(g))
+        writer.end()
+    metrics.rows('games', len(games))
+
+    if loader:
+        loader.close()
+        manifest.apply()
+    else:
+        print("")
+        print("COMMIT;")
+        print("")
+        print(f"-- Processed {len(games)} games")
+        manifest.save_pending()
 
+    get_client().report()
     print(f"-- Completed: {datetime.now().isoformat()}", file=sys.stderr)
 
 if __name__ == '__main__':
-    main()
+    with get_metrics('games').reporting():
+        main()
@@ -4,21 +4,54 @@ GitHub Actions: Sync Player Game Stats
 Fetches player box scores from NBA API and outputs SQL statements to stdout.
 Designed to be piped to psql via SSH.
 
+With --shard i/N only the games whose ID hashes to shard i are processed, so
+N runners (each with its own IP and rate budget) can split a catch-up;
+--format jsonl writes their rows for merge_shards.py to load in one
+transaction.
+
 Usage:
     python github_sync_player_stats.py > player_stats.sql
     ssh vps "docker exec -i postgres psql -U user -d db" < player_stats.sql
+    python github_sync_player_stats.py --days 30 --shard 0/4 --format jsonl > shard-0.jsonl
 """
 
 import sys
 import time
-import requests
+import zlib
+import argparse
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from box_score_cache import BoxScoreCache, CACHE_DIR
+from http_client import get_client, backoff_delay
+from metrics import get_metrics, METRICS_DIR
+from partitions import PLAYER_GAME_STATS_PARTITIONS, ensure_sql
+from result_sets import COUNT, ZERO, OPTIONAL, ResultSetDecoder, SchemaDriftError, find_result_set
+from sync_manifest import SyncManifest, player_rows_hash, MANIFEST_PATH
+from sql_output import PLAYER_GAME_STATS, OUTPUT_FORMATS, make_writer
+
 # Configuration
 SEASON = '2025-26'
 API_DELAY = 0.6  # Seconds between API calls to avoid rate limiting
+REQUESTS_PER_SECOND = 1 / API_DELAY  # Global budget shared by all workers
+DEFAULT_WORKERS = 4
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
+RECENT_DAYS = 7  # window of completed games to sync
+REGULAR_SEASON_PREFIX = '002'  # game_id prefix of regular season games
+GAME_ID_SOURCES = ('schedule', 'gamefinder')
+
+CDN_BOX_SCORE_URL = "https://cdn.nba.com/static/json/liveData/boxscore/boxscore_{game_id}.json"
+CDN_MISSING_STATUSES = (403, 404)  # the CDN's answer for a box score it does not have
+
+# Headers for NBA CDN (same as the schedule fetch in github_sync_games.py)
+CDN_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
 
 # Required headers for NBA API
 HEADERS = {
@@ -31,8 +64,31 @@ HEADERS = {
     'x-nba-stats-token': 'true'
 }
 
-def fetch_box_score(game_id):
-    """Fetch box score for a single game with retry"""
+class RateLimiter:
+    """Token bucket limiting requests per second across all fetch workers"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request token is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def fetch_stats_box_score(game_id, limiter=None):
+    """boxscoretraditionalv2 payload from stats.nba.com, or None on failure"""
     url = f"https://stats.nba.com/stats/boxscoretraditionalv2"
     params = {
         'GameID': game_id,
@@ -43,24 +99,75 @@ def fetch_box_score(game_id):
         'RangeType': 0
     }
 
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            response = requests.get(url, headers=HEADERS, params=params, timeout=60)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            if attempt < MAX_RETRIES:
-                print(f"-- WARNING: Attempt {attempt} failed for {game_id}: {e}", file=sys.stderr)
-                time.sleep(RETRY_DELAY)
-            else:
-                print(f"-- ERROR: Failed to fetch box score for {game_id} after {MAX_RETRIES} attempts: {e}", file=sys.stderr)
-                return None
+    # Retries, backoff and the stats.nba.com circuit breaker live in the shared client
+    try:
+        response = get_client().get(url, headers=HEADERS, params=params, timeout=60, limiter=limiter)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"-- ERROR: Failed to fetch box score for {game_id} from stats.nba.com: {e}", file=sys.stderr)
+        return None
+
+def fetch_cdn_box_score(game_id, limiter=None):
+    """liveData box score payload from the NBA CDN, or None if the CDN has no Final box score"""
+    url = CDN_BOX_SCORE_URL.format(game_id=game_id)
+    try:
+        # Routine for games the CDN no longer (or never) had; not a cdn.nba.com failure
+        response = get_client().get(url, headers=CDN_HEADERS, timeout=30, limiter=limiter,
+                                    expected_status=CDN_MISSING_STATUSES)
+        if response.status_code in CDN_MISSING_STATUSES:
+            return None
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        print(f"-- WARNING: CDN box score unavailable for {game_id}: {e}", file=sys.stderr)
+        return None
+    if data.get('game', {}).get('gameStatus') != 3:
+        return None
+    return data
+
+# fetch: (game_id, limiter) -> payload or None
+# rate_limited: whether fetches spend the stats.nba.com request budget
+BoxScoreSource = namedtuple('BoxScoreSource', 'fetch rate_limited')
+
+BOX_SCORE_SOURCES = {
+    'cdn': BoxScoreSource(fetch_cdn_box_score, rate_limited=False),
+    'stats': BoxScoreSource(fetch_stats_box_score, rate_limited=True),
+}
+DEFAULT_SOURCES = ('cdn', 'stats')
+
+def fetch_box_score(game_id, limiter=None, cache=None, sources=DEFAULT_SOURCES):
+    """Fetch box score for a single game from the first source that has it
+
+    Final games are served from cache; sources are tried in order, so the CDN
+    answers most games and stats.nba.com is only hit on a CDN miss.
+    """
+    if cache:
+        cached = cache.get(game_id)
+        if cached is not None:
+            get_metrics().inc('box_scores', source='cache')
+            return cached
+
+    for name in sources:
+        source = BOX_SCORE_SOURCES[name]
+        data = source.fetch(game_id, limiter if source.rate_limited else None)
+        if data is not None:
+            get_metrics().inc('box_scores', source=name)
+            # Only games from fetch_recent_game_ids() (already Final) reach here
+            if cache:
+                cache.put(game_id, data)
+            return data
+
+    print(f"-- ERROR: No box score for {game_id} from {', '.join(sources)}", file=sys.stderr)
+    return None
 
 def parse_minutes(min_str):
-    """Convert minutes string (e.g., '32:45') to integer minutes"""
+    """Convert minutes string (e.g., '32:45' or ISO 'PT32M45.00S') to integer minutes"""
     if not min_str or min_str == '' or min_str is None:
         return 0
     try:
+        if str(min_str).startswith('PT'):
+            return int(str(min_str)[2:].split('M')[0])
         if ':' in str(min_str):
             parts = str(min_str).split(':')
             return int(parts[0])
@@ -68,147 +175,351 @@ def parse_minutes(min_str):
     except:
         return 0
 
-def fetch_recent_game_ids():
-    """Fetch game IDs for recent games that need player stats"""
+def fetch_season_game_log(season=SEASON, limiter=None):
+    """Fetch the LeagueGameFinder team game log (one row per team per game) for a season"""
     from nba_api.stats.endpoints import leaguegamefinder
-    import pandas as pd
 
     for attempt in range(1, MAX_RETRIES + 1):
+        if limiter:
+            limiter.acquire()
         try:
-            print(f"-- Fetching game IDs (attempt {attempt}/{MAX_RETRIES})...", file=sys.stderr)
+            print(f"-- Fetching {season} game log (attempt {attempt}/{MAX_RETRIES})...", file=sys.stderr)
             gamefinder = leaguegamefinder.LeagueGameFinder(
-                season_nullable=SEASON,
+                season_nullable=season,
                 league_id_nullable='00',
                 season_type_nullable='Regular Season',
                 headers=HEADERS,
                 timeout=60
             )
-            games_df = gamefinder.get_data_frames()[0]
-            break
+            return gamefinder.get_data_frames()[0]
         except Exception as e:
             if attempt < MAX_RETRIES:
                 print(f"-- Attempt {attempt} failed: {e}", file=sys.stderr)
-                time.sleep(RETRY_DELAY)
+                time.sleep(backoff_delay(attempt, base=RETRY_DELAY))
             else:
-                print(f"-- ERROR: Failed to fetch game IDs after {MAX_RETRIES} attempts: {e}", file=sys.stderr)
-                return []
+                print(f"-- ERROR: Failed to fetch {season} game log after {MAX_RETRIES} attempts: {e}", file=sys.stderr)
+                return None
+
+def fetch_recent_game_ids_from_schedule(days=RECENT_DAYS):
+    """Completed regular season game IDs from the CDN schedule (no nba_api/pandas)
+
+    Uses the same conditional download and streaming parser as
+    github_sync_games.py, so after the games sync this is usually a 304 and a
+    partial read of the local copy.
+    """
+    from github_sync_games import fetch_schedule, iter_game_dates, parse_game_date
+
+    now = datetime.now()
+    window_start = now - timedelta(days=days)
+    game_ids = []
+    with open(fetch_schedule(), encoding='utf-8') as schedule_file:
+        for date_entry in iter_game_dates(schedule_file):
+            game_date = parse_game_date(date_entry)
+            if game_date is None or game_date < window_start:
+                continue
+            if game_date > now:
+                break
+            for game in date_entry.get('games', []):
+                game_id = game.get('gameId', '')
+                if game.get('gameStatus') == 3 and game_id.startswith(REGULAR_SEASON_PREFIX):
+                    game_ids.append(game_id)
+    return game_ids
+
+def fetch_recent_game_ids_from_game_finder(days=RECENT_DAYS):
+    """Completed game IDs from LeagueGameFinder (downloads the whole season)"""
+    import pandas as pd
 
-    if games_df.empty:
+    games_df = fetch_season_game_log(SEASON)
+    if games_df is None or games_df.empty:
         return []
 
-    # Filter to last 7 days of completed games
+    # Filter to the last `days` days of completed games
     games_df['GAME_DATE'] = pd.to_datetime(games_df['GAME_DATE'])
-    seven_days_ago = datetime.now() - timedelta(days=7)
+    window_start = datetime.now() - timedelta(days=days)
 
     # Only get completed games (have WL value)
     completed = games_df[
-        (games_df['GAME_DATE'] >= seven_days_ago) &
+        (games_df['GAME_DATE'] >= window_start) &
         (games_df['WL'].isin(['W', 'L']))
     ]
 
     return completed['GAME_ID'].unique().tolist()
 
+def fetch_recent_game_ids(source='schedule', days=RECENT_DAYS):
+    """Fetch game IDs for recent games that need player stats
+
+    The CDN schedule is tried first; LeagueGameFinder (nba_api + pandas,
+    imported only on this path) is the fallback when the schedule is
+    unavailable or when source='gamefinder'.
+    """
+    if source == 'schedule':
+        try:
+            return fetch_recent_game_ids_from_schedule(days)
+        except Exception as e:
+            print(f"-- WARNING: CDN schedule unavailable ({e}), falling back to LeagueGameFinder", file=sys.stderr)
+    return fetch_recent_game_ids_from_game_finder(days)
+
+def in_shard(game_id, shard):
+    """Whether game_id belongs to shard (index, count)
+
+    The shard depends only on the game ID (CRC-32, not Python's per-process
+    salted hash), so runners agree without coordinating even when their
+    game lists differ.
+    """
+    index, count = shard
+    return zlib.crc32(game_id.encode('utf-8')) % count == index
+
+def fetch_box_scores(game_ids, workers=DEFAULT_WORKERS, cache=None, limiter=None, sources=DEFAULT_SOURCES):
+    """Fetch box scores concurrently, yielding (game_id, box_score) in input order"""
+    limiter = limiter or RateLimiter(REQUESTS_PER_SECOND)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(fetch_box_score, game_id, limiter, cache, sources) for game_id in game_ids]
+        for game_id, future in zip(game_ids, futures):
+            yield game_id, future.result()
+
+def parse_box_score(game_id, box_score, season=SEASON):
+    """Extract player rows (tuples in PLAYER_GAME_STATS column order) from a box score of either source"""
+    if 'game' in box_score:
+        return parse_cdn_box_score(game_id, box_score, season)
+    return parse_stats_box_score(game_id, box_score, season)
+
+def _cdn_pct(value):
+    # CDN percentages are unrounded fractions; stats.nba.com sends 3 decimals
+    return round(value, 3) if value else 0
+
+def parse_cdn_box_score(game_id, box_score, season=SEASON):
+    """Extract player rows from a CDN liveData box score payload
+
+    Inactive players are skipped (stats.nba.com does not list them); starters'
+    positions are reduced to the G/F/C letters stats.nba.com uses.
+    """
+    game = box_score['game']
+    players = []
+    for side in ('homeTeam', 'awayTeam'):
+        team = game.get(side, {})
+        for player in team.get('players', []):
+            if player.get('status') != 'ACTIVE':
+                continue
+            stats = player.get('statistics', {})
+            position = player.get('position') if player.get('starter') == '1' else None
+            players.append((
+                game_id,
+                season,
+                player['personId'],
+                team['teamId'],
+                parse_minutes(stats.get('minutes')),
+                stats.get('points') or 0,
+                stats.get('reboundsTotal') or 0,
+                stats.get('assists') or 0,
+                stats.get('steals') or 0,
+                stats.get('blocks') or 0,
+                stats.get('turnovers') or 0,
+                stats.get('fieldGoalsMade') or 0,
+                stats.get('fieldGoalsAttempted') or 0,
+                _cdn_pct(stats.get('fieldGoalsPercentage')),
+                stats.get('threePointersMade') or 0,
+                stats.get('threePointersAttempted') or 0,
+                _cdn_pct(stats.get('threePointersPercentage')),
+                stats.get('freeThrowsMade') or 0,
+                stats.get('freeThrowsAttempted') or 0,
+                _cdn_pct(stats.get('freeThrowsPercentage')),
+                position[-1] if position else None,
+            ))
+    return players
+
+# boxscoretraditionalv2 PlayerStats columns, in PLAYER_GAME_STATS order after game_id and season
+STATS_PLAYER_DECODER = ResultSetDecoder([
+    ('PLAYER_ID', None),
+    ('TEAM_ID', None),
+    ('MIN', parse_minutes),
+    ('PTS', COUNT),
+    ('REB', COUNT),
+    ('AST', COUNT),
+    ('STL', COUNT),
+    ('BLK', COUNT),
+    ('TO', COUNT),
+    ('FGM', COUNT),
+    ('FGA', COUNT),
+    ('FG_PCT', ZERO),
+    ('FG3M', COUNT),
+    ('FG3A', COUNT),
+    ('FG3_PCT', ZERO),
+    ('FTM', COUNT),
+    ('FTA', COUNT),
+    ('FT_PCT', ZERO),
+    ('START_POSITION', OPTIONAL),
+], constants=('game_id', 'season'))
+
+def parse_stats_box_score(game_id, box_score, season=SEASON):
+    """Extract player rows from a boxscoretraditionalv2 payload
+
+    Raises SchemaDriftError if the PlayerStats columns changed.
+    """
+    player_stats = find_result_set(box_score, 'PlayerStats')
+    if not player_stats:
+        return []
+    return STATS_PLAYER_DECODER.decode(player_stats, game_id, season)
+
+def _source_list(value):
+    sources = tuple(name.strip() for name in value.split(',') if name.strip())
+    unknown = [name for name in sources if name not in BOX_SCORE_SOURCES]
+    if not sources or unknown:
+        raise argparse.ArgumentTypeError(f"unknown box score source(s): {', '.join(unknown) or value!r} "
+                                         f"(choose from {', '.join(BOX_SCORE_SOURCES)})")
+    return sources
+
+def shard_spec(value):
+    """'i/N' -> (i, N) with 0 <= i < N"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N (e.g. 0/4), got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be 0..N-1, got {value!r}")
+    return index, count
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate player_game_stats SQL from NBA box scores')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Concurrent box score fetches (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help=f'Box score cache directory (default: {CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='Always fetch box scores from the API')
+    parser.add_argument('--manifest', default=MANIFEST_PATH,
+                        help=f'Sync manifest path (default: {MANIFEST_PATH})')
+    parser.add_argument('--full', action='store_true',
+                        help='Re-emit every game in the window, even if unchanged since the last load')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS + ('jsonl',), default='insert',
+                        help='insert: one INSERT per row; copy: COPY into a staging table + one merge; '
+                             'jsonl: shard output for merge_shards.py')
+    parser.add_argument('--dsn', help='Load directly into this database instead of printing SQL')
+    parser.add_argument('--sources', type=_source_list, default=DEFAULT_SOURCES,
+                        help=f"Box score sources in order of preference (default: {','.join(DEFAULT_SOURCES)})")
+    parser.add_argument('--metrics-dir', default=METRICS_DIR,
+                        help='Write player_stats.json / player_stats.prom run metrics here (default: $ETL_METRICS_DIR)')
+    parser.add_argument('--game-id-source', choices=GAME_ID_SOURCES, default='schedule',
+                        help='schedule: completed games from the CDN schedule (falls back to gamefinder); '
+                             'gamefinder: LeagueGameFinder via nba_api')
+    parser.add_argument('--days', type=int, default=RECENT_DAYS,
+                        help=f'Window of completed games to sync (default: {RECENT_DAYS})')
+    parser.add_argument('--shard', type=shard_spec,
+                        help='Only process shard i of N (0-based, e.g. 0/4) of the game IDs')
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    metrics = get_metrics()
+    metrics.directory = args.metrics_dir
+
     print("-- GitHub Actions: Player Stats Sync", file=sys.stderr)
     print(f"-- Season: {SEASON}", file=sys.stderr)
     print(f"-- Started: {datetime.now().isoformat()}", file=sys.stderr)
 
     # Get recent game IDs
     print("-- Fetching recent game IDs...", file=sys.stderr)
-    game_ids = fetch_recent_game_ids()
+    with metrics.stage('game_ids'):
+        game_ids = fetch_recent_game_ids(args.game_id_source, args.days)
+    if args.shard:
+        found = len(game_ids)
+        game_ids = [game_id for game_id in game_ids if in_shard(game_id, args.shard)]
+        print(f"-- Shard {args.shard[0]}/{args.shard[1]}: {len(game_ids)} of {found} games", file=sys.stderr)
 
     if not game_ids:
         print("-- No recent games found", file=sys.stderr)
         print("-- SQL output empty (no player stats to sync)")
         sys.exit(0)
 
-    print(f"-- Found {len(game_ids)} games to process", file=sys.stderr)
-
-    # Output SQL header
-    print("-- NBA Player Stats Sync SQL")
-    print(f"-- Generated: {datetime.now().isoformat()}")
-    print(f"-- Season: {SEASON}")
-    print(f"-- Games: {len(game_ids)}")
-    print("")
-    print("BEGIN;")
-    print("")
-
-    # Delete existing stats for these games first
-    game_ids_str = "', '".join(game_ids)
-    print(f"-- Delete existing stats for games being synced")
-    print(f"DELETE FROM player_game_stats WHERE game_id IN ('{game_ids_str}');")
-    print("")
+    # Stable order keeps the generated SQL diffable between runs
+    game_ids = sorted(game_ids)
+
+    print(f"-- Found {len(game_ids)} games to process ({args.workers} workers)", file=sys.stderr)
+
+    cache = None if args.no_cache else BoxScoreCache(args.cache_dir)
+    manifest = SyncManifest(args.manifest)
+
+    loader = None
+    if args.dsn:
+        from db_loader import connect
+        loader = connect(args.dsn)
+        loader.execute(ensure_sql(PLAYER_GAME_STATS_PARTITIONS, SEASON), label='Season partition')
+        writer = loader.writer(PLAYER_GAME_STATS)
+    elif args.format == 'jsonl':
+        writer = make_writer(args.format, PLAYER_GAME_STATS)
+    else:
+        # Output SQL header
+        print("-- NBA Player Stats Sync SQL")
+        print(f"-- Generated: {datetime.now().isoformat()}")
+        print(f"-- Season: {SEASON}")
+        print(f"-- Games: {len(game_ids)}")
+        print("")
+        print("BEGIN;")
+        print(ensure_sql(PLAYER_GAME_STATS_PARTITIONS, SEASON))
+        writer = make_writer(args.format, PLAYER_GAME_STATS)
 
     total_players = 0
+    changed_games = 0
+    writer.begin()
 
-    # Process each game
-    for idx, game_id in enumerate(game_ids, 1):
-        print(f"-- Processing game {idx}/{len(game_ids)}: {game_id}", file=sys.stderr)
-
-        box_score = fetch_box_score(game_id)
-        if not box_score:
-            continue
+    # Process each game (fetched concurrently, emitted in game order)
+    box_scores = fetch_box_scores(game_ids, args.workers, cache, sources=args.sources)
+    with metrics.stage('box_scores'):
+        for idx, (game_id, box_score) in enumerate(box_scores, 1):
+            print(f"-- Processing game {idx}/{len(game_ids)}: {game_id}", file=sys.stderr)
 
-        # Parse player stats
-        try:
-            result_sets = box_score.get('resultSets', [])
-            player_stats = None
-            for rs in result_sets:
-                if rs.get('name') == 'PlayerStats':
-                    player_stats = rs
-                    break
-
-            if not player_stats:
+            if not box_score:
                 continue
 
-            headers = player_stats['headers']
-            rows = player_stats['rowSet']
-
-            # Create index mapping
-            col_idx = {h: i for i, h in enumerate(headers)}
-
-            for row in rows:
-                player_id = row[col_idx.get('PLAYER_ID', 0)]
-                team_id = row[col_idx.get('TEAM_ID', 0)]
-                minutes = parse_minutes(row[col_idx.get('MIN', 0)])
-                points = row[col_idx.get('PTS', 0)] or 0
-                rebounds = row[col_idx.get('REB', 0)] or 0
-                assists = row[col_idx.get('AST', 0)] or 0
-                steals = row[col_idx.get('STL', 0)] or 0
-                blocks = row[col_idx.get('BLK', 0)] or 0
-                turnovers = row[col_idx.get('TO', 0)] or 0
-                fg_made = row[col_idx.get('FGM', 0)] or 0
-                fg_attempted = row[col_idx.get('FGA', 0)] or 0
-                fg_pct = row[col_idx.get('FG_PCT', 0)] or 0
-                fg3_made = row[col_idx.get('FG3M', 0)] or 0
-                fg3_attempted = row[col_idx.get('FG3A', 0)] or 0
-                fg3_pct = row[col_idx.get('FG3_PCT', 0)] or 0
-                ft_made = row[col_idx.get('FTM', 0)] or 0
-                ft_attempted = row[col_idx.get('FTA', 0)] or 0
-                ft_pct = row[col_idx.get('FT_PCT', 0)] or 0
-                start_position = row[col_idx.get('START_POSITION', '')] or None
-
-                # Handle NULL for start_position
-                start_pos_sql = f"'{start_position}'" if start_position else 'NULL'
-
-                print(f"""INSERT INTO player_game_stats (game_id, player_id, team_id, minutes, points, rebounds, assists, steals, blocks, turnovers, fg_made, fg_attempted, fg_pct, fg3_made, fg3_attempted, fg3_pct, ft_made, ft_attempted, ft_pct, start_position, created_at)
-VALUES ('{game_id}', {player_id}, {team_id}, {minutes}, {points}, {rebounds}, {assists}, {steals}, {blocks}, {turnovers}, {fg_made}, {fg_attempted}, {fg_pct}, {fg3_made}, {fg3_attempted}, {fg3_pct}, {ft_made}, {ft_attempted}, {ft_pct}, {start_pos_sql}, NOW());""")
-                total_players += 1
-
-        except Exception as e:
-            print(f"-- WARNING: Error parsing game {game_id}: {e}", file=sys.stderr)
-            continue
+            # Parse player stats
+            try:
+                with metrics.stage('parse'):
+                    players = parse_box_score(game_id, box_score)
+            except SchemaDriftError as e:
+                # Every later stats.nba.com payload would decode wrongly too
+                print(f"-- ERROR: Box score schema changed (game {game_id}): {e}", file=sys.stderr)
+                sys.exit(1)
+            except Exception as e:
+                print(f"-- WARNING: Error parsing game {game_id}: {e}", file=sys.stderr)
+                continue
 
-        # Rate limiting
-        time.sleep(API_DELAY)
+            # Skip games already loaded with identical stats
+            digest = player_rows_hash(players)
+            if not args.full and manifest.is_current('player_game_stats', game_id, digest):
+                continue
+            manifest.record('player_game_stats', game_id, digest)
+            changed_games += 1
 
-    print("")
-    print("COMMIT;")
-    print("")
-    print(f"-- Processed {total_players} player records from {len(game_ids)} games")
+            # Replace existing stats for this game
+            writer.replace(game_id)
+            for row in players:
+                writer.write(row)
+                total_players += 1
 
+    with metrics.stage('load' if loader else 'emit_sql'):
+        writer.end()
+    metrics.rows('player_game_stats', total_players)
+
+    if loader:
+        loader.close()
+        manifest.apply()
+    elif args.format == 'jsonl':
+        pass  # merge_shards.py records the manifest when it loads the shards
+    else:
+        print("")
+        print("COMMIT;")
+        print("")
+        print(f"-- Processed {total_players} player records from {changed_games} new or changed games")
+        manifest.save_pending()
+
+    if cache:
+        cache.prune()
+        stats = cache.stats()
+        print(f"-- Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} games stored", file=sys.stderr)
+
+    get_client().report()
     print(f"-- Completed: {datetime.now().isoformat()}", file=sys.stderr)
+    print(f"-- Games emitted: {changed_games}/{len(game_ids)}", file=sys.stderr)
     print(f"-- Total players: {total_players}", file=sys.stderr)
 
 if __name__ == '__main__':
-    main()
+    with get_metrics('player_stats').reporting():
+        main()
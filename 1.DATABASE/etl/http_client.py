@@ -0,0 +1,263 @@
+"""
+Shared HTTP Client
+One pooled requests.Session for every ETL script, so repeated calls to the
+same host reuse keep-alive connections instead of a new TLS handshake each.
+
+On top of the session:
+    - gzip/deflate (and brotli, when the brotli package is installed) accepted
+    - retries on timeouts, connection errors, truncated or undecodable bodies,
+      429 and 5xx with exponential backoff plus full jitter; a Retry-After
+      header takes precedence (other request errors fail without a retry)
+    - a per-host circuit breaker: after BREAKER_THRESHOLD consecutive failures
+      requests to that host fail fast for BREAKER_COOLDOWN seconds, then a
+      single trial request decides whether it closes again; statuses a caller
+      expects (expected_status, e.g. a CDN 404 for a missing file) are
+      answers, not failures
+    - per-host request, retry, failure and latency counters (client.stats()),
+      also recorded with bytes downloaded in the run metrics (metrics.py)
+
+Usage:
+    from http_client import get_client
+    response = get_client().get(url, headers=HEADERS, params=params, timeout=60)
+    response.raise_for_status()
+"""
+
+import sys
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import get_metrics
+
+# Configuration
+POOL_CONNECTIONS = 4  # hosts kept in the pool
+POOL_MAXSIZE = 8  # connections per host (>= fetch workers)
+MAX_RETRIES = 3  # attempts per request
+BACKOFF_BASE = 1.0  # seconds; attempt n waits up to BACKOFF_BASE * 2**(n-1)
+BACKOFF_MAX = 30.0
+RETRY_AFTER_MAX = 120.0  # cap on a server-requested delay
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+BLOCKED_STATUSES = frozenset({403})  # counted towards the breaker, not retried
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)
+BREAKER_THRESHOLD = 5  # consecutive failures before a host's circuit opens
+BREAKER_COOLDOWN = 60.0  # seconds before a trial request is let through
+
+def _accept_encoding():
+    """urllib3 only decodes br when a brotli package is importable"""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return 'gzip, deflate'
+    return 'gzip, deflate, br'
+
+ACCEPT_ENCODING = _accept_encoding()
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff for the given 1-based attempt"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+def retry_after(response):
+    """Seconds requested by a Retry-After header (delta or HTTP date), or None"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostStats:
+    """Counters for one host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.circuit_opens = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'circuit_opens': self.circuit_opens,
+            'latency_avg': self.latency_total / self.requests if self.requests else 0.0,
+            'latency_max': self.latency_max,
+        }
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one host (closed -> open -> half-open)"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if self.trial_in_flight or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        self.trial_in_flight = True  # half-open: let one request test the host
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        """Returns True if this failure opened the circuit"""
+        self.failures += 1
+        was_open = self.opened_at is not None
+        self.trial_in_flight = False
+        if was_open or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            return not was_open
+        return False
+
+class HttpClient:
+    """Pooled session with retries, backoff and per-host circuit breakers"""
+
+    def __init__(self, max_retries=MAX_RETRIES, breaker_threshold=BREAKER_THRESHOLD,
+                 breaker_cooldown=BREAKER_COOLDOWN):
+        self.max_retries = max_retries
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.breakers = {}
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _host(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = HostStats()
+            self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return self.hosts[host], self.breakers[host]
+
+    def get(self, url, params=None, headers=None, timeout=30, stream=False, limiter=None, expected_status=()):
+        """GET with retries; returns the final response (callers raise_for_status)
+
+        limiter, if given, is acquired before every attempt so retries spend
+        the same request budget as first attempts. Responses with a status in
+        expected_status are returned as they are, without a retry or counting
+        towards the host's circuit breaker.
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(1, self.max_retries + 1):
+            with self.lock:
+                stats, breaker = self._host(host)
+                if not breaker.allow():
+                    raise CircuitOpenError(f"circuit open for {host} after {breaker.failures} consecutive failures")
+            if limiter:
+                limiter.acquire()
+
+            response = None
+            error = None
+            recorded = False
+            start = time.perf_counter()
+            try:
+                try:
+                    response = self.session.get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+                except requests.RequestException as e:
+                    error = e
+                elapsed = time.perf_counter() - start
+
+                failed = error is not None or (response.status_code in RETRY_STATUSES | BLOCKED_STATUSES
+                                               and response.status_code not in expected_status)
+                retry = failed and attempt < self.max_retries and (
+                    isinstance(error, RETRY_ERRORS) if error is not None
+                    else response.status_code in RETRY_STATUSES)
+                with self.lock:
+                    stats.requests += 1
+                    stats.latency_total += elapsed
+                    stats.latency_max = max(stats.latency_max, elapsed)
+                    if failed:
+                        stats.failures += 1
+                        if breaker.record_failure():
+                            stats.circuit_opens += 1
+                            print(f"-- WARNING: {host} is failing, pausing requests for "
+                                  f"{breaker.cooldown:.0f}s", file=sys.stderr)
+                    else:
+                        breaker.record_success()
+                    recorded = True
+                    if retry:
+                        stats.retries += 1
+            finally:
+                if not recorded:
+                    # Anything else escaping the request still ends a half-open trial,
+                    # or the host would be refused for the rest of the process
+                    with self.lock:
+                        breaker.record_failure()
+
+            metrics = get_metrics()
+            metrics.observe('http_request_duration_seconds', elapsed, host=host)
+            metrics.inc('http_requests', host=host)
+            if failed:
+                metrics.inc('http_failures', host=host)
+            if retry:
+                metrics.inc('http_retries', host=host)
+
+            if not retry:
+                if error is not None:
+                    raise error
+                if not stream:
+                    # Streamed bodies are counted by the caller as they are read
+                    metrics.inc('http_bytes', len(response.content), host=host)
+                return response
+
+            delay = retry_after(response)
+            delay = min(delay, RETRY_AFTER_MAX) if delay is not None else backoff_delay(attempt)
+            reason = error or f"HTTP {response.status_code}"
+            print(f"-- WARNING: Attempt {attempt} failed for {url}: {reason}; retrying in {delay:.1f}s",
+                  file=sys.stderr)
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+    def stats(self):
+        """{host: counters} for every host contacted so far"""
+        with self.lock:
+            return {host: stats.as_dict() for host, stats in self.hosts.items()}
+
+    def report(self):
+        """Print per-host counters to stderr"""
+        for host, stats in sorted(self.stats().items()):
+            print(f"-- HTTP {host}: {stats['requests']} requests, {stats['retries']} retries, "
+                  f"{stats['failures']} failures, avg {stats['latency_avg']:.2f}s, "
+                  f"max {stats['latency_max']:.2f}s", file=sys.stderr)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide shared client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Run Metrics
+Shared instrumentation for the ETL scripts. Each process has one registry
+(get_metrics()) recording:
+
+    stage_duration_seconds          wall time per named stage
+    http_request_duration_seconds   latency histogram per host
+    http_requests/retries/failures  counters per host
+    http_bytes                      bytes downloaded per host
+    box_scores                      box scores per source (cache, cdn, stats)
+    db_batch_duration_seconds       latency histogram per loaded table
+    rows_written                    rows emitted or loaded per table
+    live_polls                      live scoreboard polls per result
+
+When --metrics-dir (or ETL_METRICS_DIR) is set, a script writes its report on
+exit as {dir}/{job}.json and, in Prometheus textfile-collector format,
+{dir}/{job}.prom. Stages timed outside Python, such as the workflow's psql
+import, are added afterwards with the CLI.
+
+Usage:
+    python metrics.py --dir /tmp/etl-metrics record games import 12.4
+    python metrics.py --dir /tmp/etl-metrics show
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+# Configuration
+METRICS_DIR = os.environ.get('ETL_METRICS_DIR')
+METRIC_PREFIX = 'etl'
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    'stage_duration_seconds': 'Wall time of each ETL stage',
+    'run_duration_seconds': 'Wall time of the whole run',
+    'run_success': '1 if the run finished successfully',
+    'run_timestamp_seconds': 'Unix time the run finished',
+    'http_request_duration_seconds': 'HTTP request latency (time to response headers)',
+    'http_requests': 'HTTP requests sent',
+    'http_retries': 'HTTP requests retried',
+    'http_failures': 'HTTP requests that failed (errors, 403, 429, 5xx)',
+    'http_bytes': 'Response bytes downloaded',
+    'box_scores': 'Box scores obtained, by source (cache, cdn, stats)',
+    'db_batch_duration_seconds': 'Direct-load batch transaction time',
+    'rows_written': 'Rows emitted as SQL or loaded into the database',
+    'live_polls': 'Live scoreboard polls, by result (changed, unchanged, not_modified, error)',
+}
+
+class Histogram:
+    """Fixed-bucket histogram (per-bucket counts, cumulated on export)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+    def as_dict(self):
+        return {
+            'buckets': {_format_bound(bound): total for bound, total in self.cumulative()},
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        bounds = [b for b in data['buckets'] if b != '+Inf']
+        histogram = cls(float(b) for b in bounds)
+        previous = 0
+        for i, total in enumerate(data['buckets'].values()):
+            histogram.counts[i] = total - previous
+            previous = total
+        histogram.sum = data['sum']
+        histogram.count = data['count']
+        return histogram
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _prom_labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}'
+
+class Metrics:
+    """Thread-safe registry of stage timings, counters and histograms for one run"""
+
+    def __init__(self, job=None):
+        self.job = job
+        self.directory = METRICS_DIR
+        self.started_at = time.time()
+        self.finished_at = None
+        self.status = None
+        self.stages = {}
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> Histogram
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block as a named stage (repeated stages accumulate)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels_key(labels))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def rows(self, table, count):
+        self.inc('rows_written', count, table=table)
+
+    def report(self):
+        """JSON-serialisable run report"""
+        with self.lock:
+            finished_at = self.finished_at or time.time()
+            return {
+                'job': self.job,
+                'status': self.status,
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(),
+                'finished_at': datetime.fromtimestamp(finished_at).isoformat(),
+                'duration_seconds': round(finished_at - self.started_at, 3),
+                'stages': {name: round(seconds, 3) for name, seconds in self.stages.items()},
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                'histograms': [dict(name=name, labels=dict(labels), **histogram.as_dict())
+                               for (name, labels), histogram in sorted(self.histograms.items())],
+            }
+
+    @classmethod
+    def from_report(cls, report):
+        metrics = cls(report['job'])
+        metrics.status = report['status']
+        metrics.started_at = datetime.fromisoformat(report['started_at']).timestamp()
+        metrics.finished_at = datetime.fromisoformat(report['finished_at']).timestamp()
+        metrics.stages = dict(report['stages'])
+        for counter in report['counters']:
+            metrics.counters[(counter['name'], _labels_key(counter['labels']))] = counter['value']
+        for data in report['histograms']:
+            key = (data['name'], _labels_key(data['labels']))
+            metrics.histograms[key] = Histogram.from_dict(data)
+        return metrics
+
+    def prometheus(self):
+        """Report in Prometheus text exposition format"""
+        report = self.report()
+        job = (('etl_job', self.job),)
+        lines = []
+
+        def header(name, kind, suffix=''):
+            metric = f"{METRIC_PREFIX}_{name}{suffix}"
+            lines.append(f"# HELP {metric} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} {kind}")
+            return metric
+
+        metric = header('run_duration_seconds', 'gauge')
+        lines.append(f"{metric}{_prom_labels(job)} {report['duration_seconds']}")
+        metric = header('run_success', 'gauge')
+        lines.append(f"{metric}{_prom_labels(job)} {1 if self.status == 'success' else 0}")
+        metric = header('run_timestamp_seconds', 'gauge')
+        lines.append(f"{metric}{_prom_labels(job)} {int(self.finished_at or time.time())}")
+
+        if report['stages']:
+            metric = header('stage_duration_seconds', 'gauge')
+            for stage, seconds in report['stages'].items():
+                lines.append(f"{metric}{_prom_labels(job + (('stage', stage),))} {seconds}")
+
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+
+        for name in sorted({name for (name, _), _ in counters}):
+            metric = header(name, 'counter', suffix='_total')
+            for (counter, labels), value in counters:
+                if counter == name:
+                    lines.append(f"{metric}{_prom_labels(job + labels)} {value}")
+
+        for name in sorted({name for (name, _), _ in histograms}):
+            metric = header(name, 'histogram')
+            for (histogram_name, labels), histogram in histograms:
+                if histogram_name != name:
+                    continue
+                for bound, total in histogram.cumulative():
+                    bucket_labels = job + labels + (('le', _format_bound(bound)),)
+                    lines.append(f"{metric}_bucket{_prom_labels(bucket_labels)} {total}")
+                lines.append(f"{metric}_sum{_prom_labels(job + labels)} {round(histogram.sum, 6)}")
+                lines.append(f"{metric}_count{_prom_labels(job + labels)} {histogram.count}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory=None):
+        """Write {job}.json and {job}.prom atomically (textfile collectors read *.prom)"""
+        directory = directory or self.directory
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        for suffix, content in (('json', json.dumps(self.report(), indent=2) + '\n'),
+                                ('prom', self.prometheus())):
+            path = os.path.join(directory, f"{self.job}.{suffix}")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+    @contextmanager
+    def reporting(self):
+        """Wrap a script's main(): records success/failure and writes the report on exit"""
+        self.status = 'failure'
+        try:
+            yield self
+            self.status = 'success'
+        except SystemExit as e:
+            if e.code in (None, 0):
+                self.status = 'success'
+            raise
+        finally:
+            self.finished_at = time.time()
+            self.write()
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics(job=None):
+    """Process-wide registry; the first caller with a job name sets it"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(job)
+        elif job and not _metrics.job:
+            _metrics.job = job
+        return _metrics
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and extend ETL run reports')
+    parser.add_argument('--dir', default=METRICS_DIR, required=METRICS_DIR is None,
+                        help='Metrics directory (default: $ETL_METRICS_DIR)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record = subparsers.add_parser('record', help='Add an externally timed stage to a job report')
+    record.add_argument('job')
+    record.add_argument('stage')
+    record.add_argument('seconds', type=float)
+    subparsers.add_parser('show', help='Print stage timings of every job report')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        path = os.path.join(args.dir, f"{args.job}.json")
+        try:
+            with open(path) as f:
+                metrics = Metrics.from_report(json.load(f))
+        except OSError:
+            metrics = Metrics(args.job)
+            metrics.status = 'success'
+            metrics.started_at = metrics.finished_at = time.time() - args.seconds
+        metrics.add_stage(args.stage, args.seconds)
+        metrics.finished_at += args.seconds
+        metrics.write(args.dir)
+        print(f"-- {args.job}: recorded {args.stage} ({args.seconds:.2f}s)", file=sys.stderr)
+    elif args.command == 'show':
+        for name in sorted(os.listdir(args.dir)):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(args.dir, name)) as f:
+                report = json.load(f)
+            stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in report['stages'].items())
+            print(f"-- {report['job']}: {report['status']} in {report['duration_seconds']:.2f}s ({stages})",
+                  file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
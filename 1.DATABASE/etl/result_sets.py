@@ -0,0 +1,96 @@
+"""
+resultSet Decoder
+Turns the rowSet of a stats.nba.com resultSet ({"name", "headers", "rowSet"})
+into compact tuples ready for the sql_output / db_loader writers.
+
+A decoder is declared once as a list of Fields. For each distinct header
+list it compiles a projector, a generated function that reads every field
+at a fixed index and converts it inline, so decoding a row is one function
+call instead of a dictionary lookup per column. Missing headers and rows of
+the wrong width raise SchemaDriftError instead of decoding the wrong column.
+
+Conversions:
+    None      the value as sent
+    COUNT     int, with null as 0
+    ZERO      null as 0, otherwise as sent (percentages)
+    OPTIONAL  empty string as null
+    callable  called with the value (e.g. parse_minutes)
+"""
+
+import keyword
+from collections import namedtuple
+
+# Inline conversions, formatted with the row[i] expression
+COUNT = 'int({} or 0)'
+ZERO = '({} or 0)'
+OPTIONAL = '({} or None)'
+
+# header: resultSet column name; convert: None, an inline conversion or a callable
+Field = namedtuple('Field', 'header convert')
+
+class SchemaDriftError(ValueError):
+    """A resultSet no longer has the columns a decoder was declared for"""
+
+def find_result_set(payload, name):
+    """The resultSet called name from a stats.nba.com payload, or None"""
+    for result_set in payload.get('resultSets', []):
+        if result_set.get('name') == name:
+            return result_set
+    return None
+
+class ResultSetDecoder:
+    """Compiled rowSet -> tuple projection, cached per header list
+
+    constants are argument names whose values lead every tuple, for columns
+    the payload does not repeat per row (e.g. the requested game_id).
+    """
+
+    def __init__(self, fields, constants=()):
+        self.fields = tuple(Field(*field) for field in fields)
+        self.constants = tuple(constants)
+        for name in self.constants:
+            if not name.isidentifier() or keyword.iskeyword(name) or name.startswith('_'):
+                raise ValueError(f"constant name must be a plain identifier, got {name!r}")
+        self._compiled = {}
+
+    def compile(self, headers):
+        """Projector function(row, *constants) -> tuple for this header list"""
+        headers = tuple(headers)
+        projector = self._compiled.get(headers)
+        if projector is not None:
+            return projector
+
+        index = {header: i for i, header in enumerate(headers)}
+        missing = [field.header for field in self.fields if field.header not in index]
+        if missing:
+            raise SchemaDriftError(f"resultSet is missing column(s): {', '.join(missing)}")
+
+        namespace = {}
+        values = list(self.constants)
+        for n, field in enumerate(self.fields):
+            value = f"_row[{index[field.header]}]"
+            if field.convert is None:
+                values.append(value)
+            elif callable(field.convert):
+                namespace[f"_convert{n}"] = field.convert
+                values.append(f"_convert{n}({value})")
+            else:
+                values.append(field.convert.format(value))
+        arguments = ', '.join(('_row',) + self.constants)
+        source = f"def _project({arguments}):\n    return ({', '.join(values)},)\n"
+        exec(compile(source, f"<resultSet decoder {len(headers)} columns>", 'exec'), namespace)
+
+        projector = namespace['_project']
+        self._compiled[headers] = projector
+        return projector
+
+    def decode(self, result_set, *constants):
+        """Tuples for every row of result_set"""
+        headers = result_set['headers']
+        rows = result_set['rowSet']
+        project = self.compile(headers)
+        width = len(headers)
+        for i, row in enumerate(rows):
+            if len(row) != width:
+                raise SchemaDriftError(f"row {i} has {len(row)} values for {width} headers")
+        return [project(row, *constants) for row in rows]
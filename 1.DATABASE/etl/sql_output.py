@@ -0,0 +1,219 @@
+"""
+SQL Output Writers
+Shared by the sync scripts to turn row tuples into SQL text for psql.
+
+Formats:
+    insert  One INSERT statement per row (original output)
+    copy    COPY ... FROM STDIN into a temp staging table, then one
+            set-based INSERT ... ON CONFLICT / DELETE + INSERT into the target
+    jsonl   One JSON line per key instead of SQL, for shard runs that
+            merge_shards.py combines into a single load
+"""
+
+import sys
+import json
+from collections import namedtuple
+
+OUTPUT_FORMATS = ('insert', 'copy')
+
+# table: target table
+# columns: columns supplied by the row tuples, in order
+# key: conflict key (upsert) or the column whose rows are replaced (replace)
+# mode: 'upsert' -> INSERT ... ON CONFLICT (key) DO UPDATE SET update_columns
+#       'replace' -> DELETE rows sharing key with the new rows, then INSERT
+# timestamp: column set to NOW() on write
+# partition: column the table is partitioned by (see partitions.py); replace
+#            deletes are limited to the partitions of the new rows
+TableSpec = namedtuple('TableSpec', 'table columns key mode update_columns timestamp partition',
+                       defaults=(None,))
+
+GAMES = TableSpec(
+    table='games',
+    columns=('game_id', 'game_date', 'season', 'home_team_id', 'away_team_id',
+             'home_team_score', 'away_team_score', 'game_status'),
+    key='game_id',
+    mode='upsert',
+    update_columns=('home_team_score', 'away_team_score', 'game_status'),
+    timestamp='updated_at',
+)
+
+PLAYER_GAME_STATS = TableSpec(
+    table='player_game_stats',
+    columns=('game_id', 'season', 'player_id', 'team_id', 'minutes', 'points', 'rebounds', 'assists',
+             'steals', 'blocks', 'turnovers', 'fg_made', 'fg_attempted', 'fg_pct',
+             'fg3_made', 'fg3_attempted', 'fg3_pct', 'ft_made', 'ft_attempted', 'ft_pct',
+             'start_position'),
+    key='game_id',
+    mode='replace',
+    update_columns=(),
+    timestamp='created_at',
+    partition='season',
+)
+
+def sql_literal(value):
+    """Render a Python value as a SQL literal"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+def partition_scope(spec, rows, alias='t'):
+    """' AND t.<partition> IN (...)' for the partitions rows fall in, or '' for unpartitioned tables"""
+    if not spec.partition or not rows:
+        return ''
+    index = spec.columns.index(spec.partition)
+    values = sorted({row[index] for row in rows})
+    return f" AND {alias}.{spec.partition} IN ({', '.join(sql_literal(v) for v in values)})"
+
+def copy_literal(value):
+    """Render a Python value as a COPY text-format field"""
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+class InsertWriter:
+    """Emit one INSERT statement per row"""
+
+    def __init__(self, spec, out=None):
+        self.spec = spec
+        self.out = out or sys.stdout
+        self.pending_key = None
+
+    def begin(self):
+        pass
+
+    def replace(self, key_value):
+        """Delete existing rows for key_value before writing its new rows"""
+        self._delete_pending()
+        if self.spec.partition:
+            # Deleted with the first row, which names the partition to delete from
+            self.pending_key = key_value
+        else:
+            self._delete(key_value)
+
+    def write(self, row):
+        spec = self.spec
+        if self.pending_key is not None:
+            self._delete(self.pending_key, [row])
+            self.pending_key = None
+        columns = ', '.join(spec.columns + (spec.timestamp,))
+        values = ', '.join(sql_literal(v) for v in row)
+        statement = f"INSERT INTO {spec.table} ({columns})\nVALUES ({values}, NOW())"
+        if spec.mode == 'upsert':
+            updates = ',\n'.join(f"    {c} = EXCLUDED.{c}" for c in spec.update_columns + (spec.timestamp,))
+            statement += f"\nON CONFLICT ({spec.key}) DO UPDATE SET\n{updates};\n"
+        else:
+            statement += ';'
+        print(statement, file=self.out)
+
+    def end(self):
+        self._delete_pending()
+
+    def _delete_pending(self):
+        # A key replaced with no rows: delete it from every partition
+        if self.pending_key is not None:
+            self._delete(self.pending_key)
+            self.pending_key = None
+
+    def _delete(self, key_value, rows=()):
+        spec = self.spec
+        print(f"DELETE FROM {spec.table} t WHERE t.{spec.key} = {sql_literal(key_value)}"
+              f"{partition_scope(spec, rows)};", file=self.out)
+
+class CopyWriter:
+    """Emit a COPY data block into a staging table and merge it with one statement"""
+
+    def __init__(self, spec, out=None):
+        self.spec = spec
+        self.out = out or sys.stdout
+        self.staging = f"{spec.table}_staging"
+        self.partition_rows = {}
+        self.pending_key = None
+        self.empty_keys = {}  # replaced keys no row was written for, in order
+
+    def begin(self):
+        columns = ', '.join(self.spec.columns)
+        print(f"CREATE TEMP TABLE {self.staging} ON COMMIT DROP AS\n"
+              f"SELECT {columns} FROM {self.spec.table} WITH NO DATA;", file=self.out)
+        print(f"COPY {self.staging} ({columns}) FROM STDIN;", file=self.out)
+
+    def replace(self, key_value):
+        # Handled set-based in end(): rows sharing a key with staged rows are deleted,
+        # and keys replaced with no rows at all are deleted by key
+        self.pending_key = key_value
+        self.empty_keys[key_value] = True
+
+    def write(self, row):
+        if self.pending_key is not None:
+            self.empty_keys.pop(self.pending_key, None)
+            self.pending_key = None
+        if self.spec.partition:
+            # One row per partition value is enough to scope the delete
+            self.partition_rows.setdefault(row[self.spec.columns.index(self.spec.partition)], row)
+        print('\t'.join(copy_literal(v) for v in row), file=self.out)
+
+    def end(self):
+        spec = self.spec
+        columns = ', '.join(spec.columns)
+        print('\\.', file=self.out)
+        print("", file=self.out)
+        if self.empty_keys:
+            keys = ', '.join(sql_literal(key) for key in self.empty_keys)
+            print(f"DELETE FROM {spec.table} t WHERE t.{spec.key} IN ({keys});", file=self.out)
+        if spec.mode == 'replace':
+            print(f"DELETE FROM {spec.table} t USING (SELECT DISTINCT {spec.key} FROM {self.staging}) s\n"
+                  f"WHERE t.{spec.key} = s.{spec.key}"
+                  f"{partition_scope(spec, list(self.partition_rows.values()))};", file=self.out)
+        statement = (f"INSERT INTO {spec.table} ({columns}, {spec.timestamp})\n"
+                     f"SELECT {columns}, NOW() FROM {self.staging}")
+        if spec.mode == 'upsert':
+            updates = ',\n'.join(f"    {c} = EXCLUDED.{c}" for c in spec.update_columns + (spec.timestamp,))
+            statement += f"\nON CONFLICT ({spec.key}) DO UPDATE SET\n{updates}"
+        print(statement + ';', file=self.out)
+
+class JsonlWriter:
+    """Emit {"table", "key", "rows"} JSON lines, one per replaced key or upserted row"""
+
+    def __init__(self, spec, out=None):
+        self.spec = spec
+        self.out = out or sys.stdout
+        self.key = None
+        self.rows = []
+
+    def begin(self):
+        pass
+
+    def replace(self, key_value):
+        self._emit()
+        self.key = key_value
+
+    def write(self, row):
+        if self.spec.mode == 'upsert':
+            self.key = row[self.spec.columns.index(self.spec.key)]
+            self.rows.append(row)
+            self._emit()
+        else:
+            self.rows.append(row)
+
+    def end(self):
+        self._emit()
+
+    def _emit(self):
+        # A replaced key with no rows is still emitted, so the merge deletes its old rows
+        if self.rows or (self.spec.mode == 'replace' and self.key is not None):
+            line = {'table': self.spec.table, 'key': self.key, 'rows': [list(row) for row in self.rows]}
+            print(json.dumps(line, separators=(',', ':'), default=str), file=self.out)
+        self.rows = []
+        self.key = None
+
+def make_writer(output_format, spec, out=None):
+    if output_format == 'copy':
+        return CopyWriter(spec, out)
+    if output_format == 'jsonl':
+        return JsonlWriter(spec, out)
+    return InsertWriter(spec, out)
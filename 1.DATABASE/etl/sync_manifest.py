@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Sync Manifest
+Records which game_ids have been loaded into each table and the content hash
+of what was loaded, so the sync scripts only emit SQL for new or changed games.
+
+The scripts stage their updates in a pending file; the workflow commits it
+only after psql imported the generated SQL successfully, so a failed import
+never marks games as loaded.
+
+Usage:
+    python sync_manifest.py status
+    python sync_manifest.py commit     # after a successful import
+    python sync_manifest.py discard    # drop staged updates
+    python sync_manifest.py forget games 0022500123
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from datetime import datetime
+
+from sql_output import PLAYER_GAME_STATS
+
+# Configuration
+MANIFEST_PATH = os.environ.get(
+    'ETL_MANIFEST_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'statdiscute', 'sync_manifest.json')
+)
+
+def content_hash(value):
+    """Stable SHA-256 of a JSON-serialisable value"""
+    data = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+def player_rows_hash(rows):
+    """Manifest digest of a game's player rows (the hash of the per-player dicts, without season)"""
+    return content_hash([{column: value for column, value in zip(PLAYER_GAME_STATS.columns, row)
+                          if column != 'season'} for row in rows])
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+class SyncManifest:
+    """Committed {table: {game_id: hash}} state plus staged updates for this run"""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.pending_path = f"{path}.pending"
+        self.tables = _read_json(path)
+        self.updates = {}
+
+    def is_current(self, table, game_id, digest):
+        """True if game_id was already loaded into table with this content"""
+        entry = self.tables.get(table, {}).get(game_id)
+        return entry is not None and entry['hash'] == digest
+
+    def record(self, table, game_id, digest):
+        self.updates.setdefault(table, {})[game_id] = {
+            'hash': digest,
+            'loaded_at': datetime.now().isoformat(),
+        }
+
+    def save_pending(self):
+        """Merge this run's updates into the pending file for a later commit"""
+        if not self.updates:
+            return
+        pending = _read_json(self.pending_path)
+        for table, entries in self.updates.items():
+            pending.setdefault(table, {}).update(entries)
+        _write_json(self.pending_path, pending)
+
+    def apply(self):
+        """Commit this run's updates directly, once its rows are known to be loaded"""
+        for table, entries in self.updates.items():
+            self.tables.setdefault(table, {}).update(entries)
+        _write_json(self.path, self.tables)
+        self.updates = {}
+
+    def commit(self):
+        """Apply staged updates to the manifest; returns number of entries applied"""
+        pending = _read_json(self.pending_path)
+        applied = 0
+        for table, entries in pending.items():
+            self.tables.setdefault(table, {}).update(entries)
+            applied += len(entries)
+        _write_json(self.path, self.tables)
+        self.discard()
+        return applied
+
+    def discard(self):
+        if os.path.exists(self.pending_path):
+            os.remove(self.pending_path)
+
+    def forget(self, table, game_ids):
+        entries = self.tables.get(table, {})
+        dropped = [gid for gid in game_ids if entries.pop(gid, None)]
+        _write_json(self.path, self.tables)
+        return len(dropped)
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the incremental sync manifest')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help=f'Manifest path (default: {MANIFEST_PATH})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help='Show loaded and staged game counts')
+    subparsers.add_parser('commit', help='Mark staged games as loaded')
+    subparsers.add_parser('discard', help='Drop staged updates')
+    forget = subparsers.add_parser('forget', help='Force games to be re-emitted on the next run')
+    forget.add_argument('table')
+    forget.add_argument('game_ids', nargs='+')
+    args = parser.parse_args()
+
+    manifest = SyncManifest(args.manifest)
+
+    if args.command == 'commit':
+        applied = manifest.commit()
+        print(f"-- Committed {applied} manifest entries", file=sys.stderr)
+    elif args.command == 'discard':
+        manifest.discard()
+        print("-- Discarded staged manifest updates", file=sys.stderr)
+    elif args.command == 'forget':
+        dropped = manifest.forget(args.table, args.game_ids)
+        print(f"-- Forgot {dropped}/{len(args.game_ids)} games in {args.table}", file=sys.stderr)
+
+    pending = _read_json(manifest.pending_path)
+    for table in sorted(set(manifest.tables) | set(pending)):
+        print(f"-- {table}: {len(manifest.tables.get(table, {}))} loaded, "
+              f"{len(pending.get(table, {}))} staged", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
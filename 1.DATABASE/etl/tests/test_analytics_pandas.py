@@ -0,0 +1,120 @@
+"""
+Pandas analytics engine tests
+compute_standings() and compute_dvp() on small hand-built frames, checked
+against values worked out by hand with PostgreSQL's numeric rounding (half
+away from zero). benchmarks/check_analytics_parity.py compares the engines
+on a full synthetic season against a live database.
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics_pandas import _round, compute_standings, compute_dvp
+
+SEASON = '2025-26'
+TEAMS = pd.DataFrame({
+    'team_id': [1, 2, 3],
+    'conference': ['East', 'East', 'West'],
+    'division': ['Atlantic', 'Atlantic', 'Pacific'],
+})
+PLAYER_COLUMNS = ('game_id', 'team_id', 'points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+                  'fg_made', 'fg_attempted', 'fg3_made', 'fg3_attempted', 'ft_made', 'ft_attempted',
+                  'start_position')
+
+def games_frame(results):
+    """(home, away, home score, away score) per game, one day apart"""
+    start = date(2025, 10, 22)
+    return pd.DataFrame([
+        {'game_id': f"00225{n:05d}", 'game_date': start + timedelta(days=n),
+         'home_team_id': home, 'away_team_id': away, 'home_team_score': home_score, 'away_team_score': away_score}
+        for n, (home, away, home_score, away_score) in enumerate(results, 1)
+    ])
+
+def standings_by_team(results):
+    standings = compute_standings(TEAMS, games_frame(results), SEASON)
+    return {row['team_id']: row for row in standings.to_dict('records')}
+
+def test_round_is_half_away_from_zero():
+    assert _round(1, 8, 2) == Decimal('0.13')  # 0.125; banker's rounding would give 0.12
+    assert _round(2, 3, 3) == Decimal('0.667')
+    assert _round(5, 0, 2) is None
+
+def test_standings_records_and_points():
+    teams = standings_by_team([
+        (1, 2, 100, 90),   # 1 W
+        (2, 1, 105, 95),   # 1 L
+        (1, 3, 110, 100),  # 1 W
+        (3, 1, 99, 101),   # 1 W (away)
+    ])
+    one, two, three = teams[1], teams[2], teams[3]
+    assert (one['wins'], one['losses'], one['win_pct']) == (3, 1, Decimal('0.750'))
+    assert (one['home_wins'], one['home_losses'], one['away_wins'], one['away_losses']) == (2, 0, 1, 1)
+    assert (one['points_for'], one['points_against'], one['point_differential']) == \
+        (Decimal('101.5'), Decimal('98.5'), Decimal('3.0'))
+    assert (two['wins'], two['losses'], two['point_differential']) == (1, 1, Decimal('0.0'))
+    assert (three['wins'], three['losses'], three['win_pct']) == (0, 2, Decimal('0.000'))
+    assert three['point_differential'] == Decimal('-6.0')
+
+def test_standings_ranks_and_games_behind():
+    teams = standings_by_team([(1, 2, 100, 90), (2, 1, 105, 95), (1, 3, 110, 100), (3, 1, 99, 101)])
+    assert (teams[1]['conference_rank'], teams[1]['division_rank'], teams[1]['games_behind']) == (1, 1, Decimal('0.0'))
+    assert (teams[2]['conference_rank'], teams[2]['division_rank'], teams[2]['games_behind']) == (2, 2, Decimal('2.0'))
+    # Alone in the West: leads its conference whatever its record
+    assert (teams[3]['conference_rank'], teams[3]['games_behind']) == (1, Decimal('0.0'))
+
+def test_streak_and_last_10():
+    teams = standings_by_team([(1, 2, 100, 90), (2, 1, 105, 95), (1, 3, 110, 100), (3, 1, 99, 101)])
+    assert (teams[1]['streak'], teams[1]['last_10']) == ('W2', '3-1')
+    assert (teams[2]['streak'], teams[2]['last_10']) == ('W1', '1-1')
+    assert (teams[3]['streak'], teams[3]['last_10']) == ('L2', '0-2')
+
+def test_last_10_covers_only_the_ten_most_recent_games():
+    # Team 1: W W W W L L W W W W W W; the last 10 start at the third game
+    wins = [True] * 4 + [False] * 2 + [True] * 6
+    teams = standings_by_team([(1, 2, 100, 90) if won else (1, 2, 90, 100) for won in wins])
+    assert (teams[1]['wins'], teams[1]['losses']) == (10, 2)
+    assert (teams[1]['streak'], teams[1]['last_10']) == ('W6', '8-2')
+    assert (teams[2]['streak'], teams[2]['last_10']) == ('L6', '2-8')
+
+def test_dvp_allowed_stats_and_ranks():
+    games = games_frame([(1, 2, 100, 90), (2, 1, 105, 95)])
+    first, second = games['game_id']
+    players = pd.DataFrame([
+        (first, 1, 20, 4, 6, 1, 0, 2, 8, 16, 2, 5, 2, 2, 'PG'),
+        (first, 1, 30, 3, 1, 1, 0, 2, 12, 20, 3, 7, 3, 4, None),  # bench: not in DVP
+        (first, 2, 10, 2, 3, 1, 0, 2, 4, 11, 1, 3, 1, 2, 'SG'),
+        (second, 1, 25, 5, 7, 1, 0, 2, 10, 20, 3, 6, 2, 3, 'G'),
+        (second, 2, 12, 10, 1, 1, 0, 2, 6, 9, 0, 0, 0, 1, 'C'),
+    ], columns=PLAYER_COLUMNS)
+
+    dvp = {(row['team_id'], row['opponent_position']): row
+           for row in compute_dvp(games, players, SEASON).to_dict('records')}
+    assert set(dvp) == {(1, 'G'), (1, 'C'), (2, 'G')}
+
+    # Team 2 defended team 1's guards in both games
+    guards = dvp[(2, 'G')]
+    assert guards['games_played'] == 2
+    assert (guards['points_allowed'], guards['points_allowed_per_game']) == (Decimal('45.00'), Decimal('22.50'))
+    assert (guards['fg_pct_allowed'], guards['fg3_pct_allowed'], guards['ft_pct_allowed']) == \
+        (Decimal('50.00'), Decimal('45.45'), Decimal('80.00'))
+    assert (guards['rebounds_allowed_per_game'], guards['assists_allowed_per_game']) == \
+        (Decimal('4.50'), Decimal('6.50'))
+    assert (guards['steals_allowed'], guards['turnovers_forced']) == (Decimal('2.00'), Decimal('4.00'))
+
+    center = dvp[(1, 'C')]
+    assert (center['fg_pct_allowed'], center['fg3_pct_allowed'], center['ft_pct_allowed']) == \
+        (Decimal('66.67'), None, Decimal('0.00'))
+
+    # Rank 1 allows the fewest points / lowest FG%, per position
+    assert (dvp[(1, 'G')]['points_allowed_rank'], dvp[(2, 'G')]['points_allowed_rank']) == (1, 2)
+    assert (dvp[(1, 'G')]['fg_pct_allowed_rank'], dvp[(2, 'G')]['fg_pct_allowed_rank']) == (1, 2)
+    assert (center['points_allowed_rank'], center['fg_pct_allowed_rank']) == (1, 1)
@@ -0,0 +1,94 @@
+"""
+Box score parser tests
+Both sources of the same game must decode to identical PLAYER_GAME_STATS
+rows, so a game loads the same whichever source served it.
+
+The fixtures are game 0022500123 as served by each source, trimmed to a few
+players per team (starters, a bench player, a DNP and an inactive player).
+To refresh them from a live game:
+    curl -o tests/fixtures/cdn_boxscore_<id>.json \
+        https://cdn.nba.com/static/json/liveData/boxscore/boxscore_<id>.json
+    curl -o tests/fixtures/boxscoretraditionalv2_<id>.json -H 'Referer: https://www.nba.com/' \
+        'https://stats.nba.com/stats/boxscoretraditionalv2?GameID=<id>&StartPeriod=0&EndPeriod=10&StartRange=0&EndRange=28800&RangeType=0'
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_sync_player_stats import parse_box_score, parse_cdn_box_score, parse_stats_box_score
+from sql_output import PLAYER_GAME_STATS
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+GAME_ID = '0022500123'
+SEASON = '2025-26'
+INACTIVE_PLAYERS = {1629020, 1641764}  # listed by the CDN only, with status INACTIVE
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return json.load(f)
+
+def cdn_rows():
+    return parse_cdn_box_score(GAME_ID, load_fixture(f"cdn_boxscore_{GAME_ID}.json"), SEASON)
+
+def stats_rows():
+    return parse_stats_box_score(GAME_ID, load_fixture(f"boxscoretraditionalv2_{GAME_ID}.json"), SEASON)
+
+def by_player(rows):
+    """{player_id: {column: value}}"""
+    return {row[2]: dict(zip(PLAYER_GAME_STATS.columns, row)) for row in rows}
+
+def test_sources_decode_to_identical_rows():
+    assert sorted(cdn_rows()) == sorted(stats_rows())
+
+def test_rows_match_player_game_stats_columns():
+    for row in cdn_rows() + stats_rows():
+        assert len(row) == len(PLAYER_GAME_STATS.columns)
+        assert row[:2] == (GAME_ID, SEASON)
+
+def test_parse_box_score_picks_the_parser_from_the_payload():
+    assert parse_box_score(GAME_ID, load_fixture(f"cdn_boxscore_{GAME_ID}.json"), SEASON) == cdn_rows()
+    assert parse_box_score(GAME_ID, load_fixture(f"boxscoretraditionalv2_{GAME_ID}.json"), SEASON) == stats_rows()
+
+def test_cdn_skips_inactive_players():
+    payload = load_fixture(f"cdn_boxscore_{GAME_ID}.json")
+    listed = {player['personId'] for side in ('homeTeam', 'awayTeam') for player in payload['game'][side]['players']}
+    assert INACTIVE_PLAYERS <= listed
+    assert not INACTIVE_PLAYERS & set(by_player(cdn_rows()))
+
+def test_dnp_player_is_kept_with_zeros():
+    # Active but did not play: PT00M00.00S on the CDN, null stats on stats.nba.com
+    for rows in (cdn_rows(), stats_rows()):
+        knecht = by_player(rows)[1642261]
+        assert knecht['minutes'] == 0
+        assert knecht['points'] == 0
+        assert knecht['fg_pct'] == 0
+        assert knecht['start_position'] is None
+
+def test_starter_positions_reduced_to_g_f_c():
+    # CDN sends SF / PG / PF / C for starters; stats.nba.com sends F / G / F / C
+    for rows in (cdn_rows(), stats_rows()):
+        players = by_player(rows)
+        assert players[2544]['start_position'] == 'F'
+        assert players[1629029]['start_position'] == 'G'
+        assert players[203110]['start_position'] == 'F'
+        assert players[203076]['start_position'] == 'C'
+        assert players[1630559]['start_position'] is None  # bench
+
+def test_iso_minutes_truncated_to_whole_minutes():
+    players = by_player(cdn_rows())
+    assert players[2544]['minutes'] == 35  # PT35M41.00S
+    assert players[1630228]['minutes'] == 27  # PT27M05.00S
+    assert by_player(stats_rows())[2544]['minutes'] == 35  # 35:41
+
+def test_cdn_percentages_rounded_to_three_places():
+    players = by_player(cdn_rows())
+    assert players[2544]['fg3_pct'] == 0.333  # 2/6 sent unrounded
+    assert players[203076]['ft_pct'] == 0.778  # 7/9
+    assert players[1626172]['fg_pct'] == 0.667  # 2/3
+    assert players[203110]['ft_pct'] == 0  # 0/0